@@ -0,0 +1,98 @@
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.urls import re_path
+from rest_framework.permissions import SAFE_METHODS
+
+from api.views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет представление DRF вместе с рендерингом в потоке пула.
+    Подключения к базе закрываются так же, как сигналы request_started
+    и request_finished делают это для синхронных запросов.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        started = time.perf_counter()
+        response.render()
+        request.metrics_renderer = time.perf_counter() - started
+    finally:
+        close_old_connections()
+    # Готовый HttpResponse: обработчику ASGI не нужно переключаться
+    # в синхронный поток ради render().
+    plain = HttpResponse(response.content, status=response.status_code)
+    if not response.has_header('Content-Type'):
+        del plain['Content-Type']
+    for header, value in response.items():
+        plain[header] = value
+    plain.cookies = response.cookies
+    return plain
+
+
+def async_view(viewset, actions, basename, detail):
+    """Асинхронная обёртка над действиями ViewSet.
+    В Django 3.2 нет асинхронного ORM, а синхронные представления под
+    ASGI выполняются в одном общем потоке. Чтение (SAFE_METHODS) уходит
+    в пул потоков (thread_sensitive=False), поэтому медленный запрос
+    к базе не задерживает остальные. Изменяющие запросы выполняются
+    в общем потоке, как обычные синхронные представления.
+    """
+    view = viewset.as_view(actions, basename=basename, detail=detail)
+    run_read = sync_to_async(run_view, thread_sensitive=False)
+    run_write = sync_to_async(run_view, thread_sensitive=True)
+
+    async def wrapper(request, *args, **kwargs):
+        run = run_read if request.method in SAFE_METHODS else run_write
+        return await run(view, request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+urlpatterns = [
+    re_path(
+        r'^recipes/$',
+        async_view(RecipeViewSet, LIST_ACTIONS, 'recipes', False),
+        name='recipes-list',
+    ),
+    re_path(
+        r'^recipes/(?P<pk>\d+)/$',
+        async_view(RecipeViewSet, DETAIL_ACTIONS, 'recipes', True),
+        name='recipes-detail',
+    ),
+    re_path(
+        r'^tags/$',
+        async_view(TagViewSet, {'get': 'list'}, 'tags', False),
+        name='tags-list',
+    ),
+    re_path(
+        r'^tags/(?P<pk>\d+)/$',
+        async_view(TagViewSet, {'get': 'retrieve'}, 'tags', True),
+        name='tags-detail',
+    ),
+    re_path(
+        r'^ingredients/$',
+        async_view(IngredientViewSet, {'get': 'list'}, 'ingredients', False),
+        name='ingredients-list',
+    ),
+    re_path(
+        r'^ingredients/(?P<pk>\d+)/$',
+        async_view(
+            IngredientViewSet, {'get': 'retrieve'}, 'ingredients', True
+        ),
+        name='ingredients-detail',
+    ),
+]
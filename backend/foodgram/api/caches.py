@@ -0,0 +1,95 @@
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from foodgram import settings
+from groceryassistant.versions import get_table_version
+
+
+def data_etag(data):
+    """Сильный ETag по данным ответа до рендеринга."""
+    return '"{}"'.format(hashlib.md5(json.dumps(
+        data, sort_keys=True, default=str
+    ).encode('utf-8')).hexdigest())
+
+
+def etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return etag in (tag.strip() for tag in if_none_match.split(','))
+
+
+class CachedReadMixin:
+    """Кеширование ответов list/retrieve для справочных данных.
+    Ключ включает версию таблицы, поэтому при изменении данных
+    старые записи просто перестают использоваться. Ответы снабжаются
+    ETag и Last-Modified, на повторные запросы отдаётся 304.
+    """
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def cached_response(self, request, view, *args, **kwargs):
+        token, modified = get_table_version(self.queryset.model)
+        etag = None
+        key = '{}:{}:{}'.format(
+            self.basename,
+            token,
+            hashlib.md5(
+                request.get_full_path().encode('utf-8')
+            ).hexdigest(),
+        )
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = data_etag(response.data)
+            cache.set(
+                key, (etag, response.data), settings.REFERENCE_CACHE_TIMEOUT
+            )
+        else:
+            etag, data = entry
+        if self.is_not_modified(request, etag, modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif entry is not None:
+            response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        return response
+
+    @staticmethod
+    def is_not_modified(request, etag, modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag_matches(request, etag)
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return if_modified_since is not None and modified <= if_modified_since
+
+
+class ConditionalRetrieveMixin:
+    """ETag для retrieve, ответ которого зависит от пользователя
+    (флаги избранного и списка покупок). Ответ не кешируется и читается
+    из базы, но клиенту с совпадающим If-None-Match отдаётся 304 без тела.
+    """
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        etag = data_etag(response.data)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization',))
+        return response
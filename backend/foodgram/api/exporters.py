@@ -0,0 +1,117 @@
+
+import csv
+import json
+import tempfile
+from functools import lru_cache
+
+from django.http import StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from foodgram import settings
+
+
+class Echo:
+    """Псевдобуфер: csv.writer пишет строку и сразу получает её обратно."""
+    def write(self, value):
+        return value
+
+
+def rows_from_queryset(ingredients):
+    """Построчное чтение агрегированных ингредиентов серверным курсором."""
+    for ingredient in ingredients.iterator(
+            chunk_size=settings.SHOPPING_CART_CHUNK_SIZE):
+        yield (
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['ingredient_amount'],
+        )
+
+
+def export_txt(rows):
+    yield 'Список покупок:\n'
+    for name, unit, amount in rows:
+        yield f'\n{name} - {amount}, {unit}'
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_json(rows):
+    yield '['
+    separator = ''
+    for name, unit, amount in rows:
+        yield separator + json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False,
+        )
+        separator = ','
+    yield ']'
+
+
+@lru_cache(maxsize=None)
+def pdf_font():
+    """Шрифт с кириллицей регистрируется один раз на процесс."""
+    pdfmetrics.registerFont(TTFont('DejaVuSans', settings.PDF_FONT_PATH))
+    return 'DejaVuSans'
+
+
+def export_pdf(rows):
+    """PDF нельзя отдавать по мере формирования: таблица ссылок в конце
+    файла содержит смещения всех объектов. Документ пишется во временный
+    файл, который держится в памяти до PDF_SPOOL_SIZE байт, а затем
+    отдаётся частями.
+    """
+    font = pdf_font()
+    width, height = A4
+    margin = settings.PDF_MARGIN
+    line_height = settings.PDF_FONT_SIZE * 1.4
+    with tempfile.SpooledTemporaryFile(settings.PDF_SPOOL_SIZE) as file:
+        pdf = canvas.Canvas(file, pagesize=A4)
+        pdf.setTitle('Список покупок')
+        pdf.setFont(font, settings.PDF_TITLE_SIZE)
+        pdf.drawString(margin, height - margin, 'Список покупок')
+        top = height - margin - settings.PDF_TITLE_SIZE * 2
+        pdf.setFont(font, settings.PDF_FONT_SIZE)
+        for name, unit, amount in rows:
+            for line in simpleSplit(
+                    f'• {name} — {amount} {unit}', font,
+                    settings.PDF_FONT_SIZE, width - 2 * margin):
+                if top < margin:
+                    pdf.showPage()
+                    pdf.setFont(font, settings.PDF_FONT_SIZE)
+                    top = height - margin
+                pdf.drawString(margin, top, line)
+                top -= line_height
+        pdf.save()
+        file.seek(0)
+        yield from iter(lambda: file.read(settings.PDF_CHUNK_SIZE), b'')
+
+
+EXPORTERS = {
+    'txt': (export_txt, 'text/plain; charset=utf-8'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'json': (export_json, 'application/json; charset=utf-8'),
+    'pdf': (export_pdf, 'application/pdf'),
+}
+
+
+def shopping_cart_response(ingredients, file_format):
+    """Потоковая отдача списка покупок в выбранном формате."""
+    exporter, content_type = EXPORTERS[file_format]
+    response = StreamingHttpResponse(
+        exporter(rows_from_queryset(ingredients)),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = (
+        'attachment;'
+        f'filename="{settings.SHOPPING_CART_FILENAME}.{file_format}"'
+    )
+    return response
@@ -1,16 +1,29 @@
 
+from django.db.models import BooleanField, Case, Exists, OuterRef, Value, When
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
-from groceryassistant.models import Ingredient, RecipeList, Tag
+from groceryassistant.models import RecipeList, Tag
+from groceryassistant.search import search_recipes
 
 
-class IngredientFilter(SearchFilter):
+class IngredientFilter(BaseFilterBackend):
+    """Поиск ингредиентов по названию: сначала совпадения
+    по началу названия, затем по вхождению.
+    """
     search_param = 'name'
 
-    class Meta:
-        model = Ingredient
-        fields = ('name', )
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(self.search_param)
+        if not name:
+            return queryset
+        return queryset.filter(name__icontains=name).annotate(
+            is_substring=Case(
+                When(name__istartswith=name, then=Value(False)),
+                default=Value(True),
+                output_field=BooleanField(),
+            )
+        ).order_by('is_substring', 'name')
 
 
 class RecipeFilter(FilterSet):
@@ -18,6 +31,7 @@ class RecipeFilter(FilterSet):
         queryset=Tag.objects.all(),
         field_name='tags__slug',
         to_field_name='slug',
+        method='filter_tags',
     )
     is_favorited = filters.BooleanFilter(
         method='filter_is_favorited'
@@ -25,10 +39,43 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'По популярности'),),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = RecipeList
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',)
+        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'search', 'ordering',)
+
+    def filter_tags(self, queryset, name, value):
+        """Полусоединение через EXISTS: рецепт с несколькими
+        подходящими тегами попадает в выдачу один раз без DISTINCT.
+        """
+        if not value:
+            return queryset
+        return queryset.filter(Exists(
+            RecipeList.tags.through.objects.filter(
+                recipelist=OuterRef('pk'), tag__in=value
+            )
+        ))
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию, описанию и ингредиентам."""
+        value = value.strip()
+        if not value:
+            return queryset
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        """Сначала рецепты, чаще добавляемые в избранное и корзину.
+        Порядок обслуживается индексом recipe_popularity_idx.
+        """
+        return queryset.order_by(
+            '-favorites_count', '-cart_count', *RecipeList._meta.ordering
+        )
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
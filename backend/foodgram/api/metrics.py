@@ -0,0 +1,270 @@
+
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from rest_framework.renderers import BaseRenderer
+
+from foodgram import settings
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку, ближайший ранг."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+class ViewStats:
+    """Скользящее окно последних запросов одного представления.
+    Счётчики count и суммы накапливаются за всё время работы процесса.
+    """
+    def __init__(self):
+        self.durations = deque(maxlen=settings.METRICS_WINDOW)
+        self.queries = deque(maxlen=settings.METRICS_WINDOW)
+        self.serializations = deque(maxlen=settings.METRICS_WINDOW)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.queries_sum = 0
+        self.serialization_sum = 0.0
+
+    def add(self, duration, queries, serialization):
+        self.durations.append(duration)
+        self.queries.append(queries)
+        self.serializations.append(serialization)
+        self.count += 1
+        self.duration_sum += duration
+        self.queries_sum += queries
+        self.serialization_sum += serialization
+
+    def summary(self):
+        durations = sorted(self.durations)
+        queries = sorted(self.queries)
+        serializations = sorted(self.serializations)
+        return {
+            'count': self.count,
+            'duration_sum': round(self.duration_sum, 6),
+            'queries_sum': self.queries_sum,
+            'serialization_sum': round(self.serialization_sum, 6),
+            'duration': {
+                name: round(percentile(durations, fraction), 6)
+                for name, fraction in settings.METRICS_QUANTILES.items()
+            },
+            'serialization': {
+                name: round(percentile(serializations, fraction), 6)
+                for name, fraction in settings.METRICS_QUANTILES.items()
+            },
+            'queries': {
+                name: percentile(queries, fraction)
+                for name, fraction in settings.METRICS_QUANTILES.items()
+            },
+        }
+
+
+class MetricsRegistry:
+    """Статистика запросов по представлениям в памяти процесса."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, duration, queries, serialization):
+        with self.lock:
+            self.views.setdefault(view, ViewStats()).add(
+                duration, queries, serialization
+            )
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: stats.summary()
+                for view, stats in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """Число запросов, время в базе и время сериализаторов
+    для одного HTTP-запроса.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.serialization = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+# Контекстная переменная переходит и в потоки sync_to_async, поэтому
+# запросы асинхронных представлений учитываются тем же счётчиком.
+current_counter = ContextVar('current_counter', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+@lru_cache(maxsize=None)
+def timed_serializer(serializer_class):
+    """Подкласс сериализатора, время to_representation которого
+    попадает в метрики запроса. Для many=True замеряется каждый элемент
+    списка. Вложенные сериализаторы — другие классы, их время входит
+    во время внешнего и второй раз не считается.
+    """
+    class TimedSerializer(serializer_class):
+        def to_representation(self, instance):
+            started = time.perf_counter()
+            try:
+                return super().to_representation(instance)
+            finally:
+                counter = current_counter.get()
+                if counter is not None:
+                    counter.serialization += time.perf_counter() - started
+
+    TimedSerializer.__name__ = serializer_class.__name__
+    TimedSerializer.__qualname__ = serializer_class.__qualname__
+    return TimedSerializer
+
+
+class SerializerTimingMixin:
+    """Сериализаторы представления замеряются timed_serializer.
+    serializer_class задаёт класс для действий, которым нужен
+    не сериализатор представления по умолчанию.
+    """
+    def get_serializer(self, *args, serializer_class=None, **kwargs):
+        serializer_class = timed_serializer(
+            serializer_class or self.get_serializer_class()
+        )
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class MetricsMiddleware:
+    """Замеряет время запроса, число запросов к базе, время
+    сериализаторов (SerializerTimingMixin; запросы к базе из них входят
+    и в db) и время работы рендерера DRF (кодирование готовых данных
+    в JSON). Результат отдаётся в заголовке Server-Timing и попадает
+    в статистику представления, доступную через /api/metrics/.
+    Для потоковых ответов учитывается только подготовка ответа,
+    без отдачи тела.
+    Работает и в синхронном (WSGI), и в асинхронном (ASGI) стеке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        started, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            counter = current_counter.get()
+            current_counter.reset(token)
+        return self.finish(request, response, started, counter)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        started, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            counter = current_counter.get()
+            current_counter.reset(token)
+        return self.finish(request, response, started, counter)
+
+    @staticmethod
+    def start(request):
+        request.metrics_renderer = 0.0
+        return time.perf_counter(), current_counter.set(QueryCounter())
+
+    @staticmethod
+    def finish(request, response, started, counter):
+        total = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join((
+            'db;dur={:.1f};desc="{} queries"'.format(
+                counter.duration * 1000, counter.count
+            ),
+            'serializer;dur={:.1f};desc="DRF serializers"'.format(
+                counter.serialization * 1000
+            ),
+            'renderer;dur={:.1f};desc="DRF renderer"'.format(
+                request.metrics_renderer * 1000
+            ),
+            'total;dur={:.1f}'.format(total * 1000),
+        ))
+        match = request.resolver_match
+        if match is not None:
+            registry.record(
+                f'{request.method} {match.view_name}', total, counter.count,
+                counter.serialization,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        """Ответы DRF рендерятся после этого вызова: засекаем время."""
+        if settings.METRICS_ENABLED:
+            started = time.perf_counter()
+
+            def finish(rendered):
+                request.metrics_renderer = time.perf_counter() - started
+
+            response.add_post_render_callback(finish)
+        return response
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Статистика в текстовом формате Prometheus: ?format=prometheus."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or 'views' not in data:
+            return str(data)
+        lines = []
+        for metric, key, total, help_text in (
+            ('foodgram_request_duration_seconds', 'duration',
+             'duration_sum', 'Время обработки запроса'),
+            ('foodgram_request_db_queries', 'queries',
+             'queries_sum', 'Число запросов к базе'),
+            ('foodgram_request_serialization_seconds', 'serialization',
+             'serialization_sum', 'Время сериализации ответа'),
+        ):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} summary')
+            for view, stats in data['views'].items():
+                label = 'view="{}"'.format(view.replace('"', '\\"'))
+                for name, fraction in settings.METRICS_QUANTILES.items():
+                    lines.append('{}{{{},quantile="{}"}} {}'.format(
+                        metric, label, fraction, stats[key][name]
+                    ))
+                lines.append(f'{metric}_sum{{{label}}} {stats[total]}')
+                lines.append(f'{metric}_count{{{label}}} {stats["count"]}')
+        return '\n'.join(lines) + '\n'
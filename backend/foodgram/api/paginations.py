@@ -1,7 +1,55 @@
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from foodgram import settings
+
+
+class KeysetPagination(CursorPagination):
+    """Навигация по ключу сортировки модели, без OFFSET и COUNT(*)."""
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        return queryset.model._meta.ordering
+
+    @staticmethod
+    def supports(queryset):
+        """Курсор строится по Meta.ordering, поэтому подходит только
+        для выборок в этом порядке: поиск по релевантности, популярные
+        и подбор по продуктам упорядочены иначе.
+        """
+        return tuple(queryset.query.order_by) in (
+            (), tuple(queryset.model._meta.ordering)
+        )
 
 
 class CustomPagination(PageNumberPagination):
+    """Постраничная навигация. С параметром cursor (в том числе пустым)
+    переключается на KeysetPagination, если выборка упорядочена
+    по Meta.ordering; иначе остаётся постраничной.
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+    cursor_query_param = KeysetPagination.cursor_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (self.cursor_query_param in request.query_params
+                and KeysetPagination.supports(queryset)):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedPagination(PageNumberPagination):
+    """Постраничная навигация по готовому списку id ленты."""
     page_size = 6
     page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
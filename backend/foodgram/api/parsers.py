@@ -0,0 +1,26 @@
+
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Разбор NDJSON: по одному JSON-объекту в строке.
+    Тело читается построчно, без загрузки целиком.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return [
+                json.loads(line)
+                for line in codecs.getreader(encoding)(stream)
+                if line.strip()
+            ]
+        except ValueError as exc:
+            raise ParseError(f'NDJSON parse error - {exc}')
@@ -1,5 +1,6 @@
 
 from django.contrib.auth.hashers import check_password
+from django.db import connection, transaction
 from django.shortcuts import get_object_or_404
 from djoser.serializers import (PasswordSerializer, UserCreateSerializer,
                                 UserSerializer)
@@ -8,11 +9,18 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.fields import SerializerMethodField
 from rest_framework.validators import UniqueTogetherValidator
 
-from api.utils import Base64ImageField
+from api.utils import Base64ImageField, ViewerContext
 from foodgram import settings
+from groceryassistant.aggregates import refresh_totals_for_recipe
+from groceryassistant.catalog import ingredient_catalog
+from groceryassistant.counters import recount
+from groceryassistant.feed import schedule_timeline_invalidation
+from groceryassistant.images import rendition_urls, schedule_renditions
 from groceryassistant.models import (Favoritelist, Ingredient,
                                      IngredientInRecipe, RecipeList,
                                      Shoppinglist, Tag)
+from groceryassistant.pantry import update_ingredients_count
+from groceryassistant.search import update_search_vector
 from users.models import User
 
 
@@ -62,14 +70,14 @@ class MyUserListSerializer(UserSerializer):
         ]
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return (request.user.is_authenticated and obj.following.filter(
-            user=request.user).exists())
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return ViewerContext.from_serializer_context(
+            self.context).is_subscribed(obj)
 
 
 class FollowsListSerializer(MyUserListSerializer):
     """Сериализатор для предоставления информации о подписках пользователя."""
-    recipes_count = SerializerMethodField(method_name='get_recipes_count')
     recipes = SerializerMethodField(method_name='get_recipes')
 
     class Meta:
@@ -77,7 +85,7 @@ class FollowsListSerializer(MyUserListSerializer):
         fields = ('email', 'id', 'username', 'first_name',
                   'last_name', 'recipes', 'recipes_count')
         read_only_fields = ('email', 'username',
-                            'first_name', 'last_name')
+                            'first_name', 'last_name', 'recipes_count')
 
     def validate(self, data):
         author_id = self.context.get(
@@ -97,22 +105,18 @@ class FollowsListSerializer(MyUserListSerializer):
         return data
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'limited_recipes'):
+            return RecipeShortSerializer(obj.limited_recipes, many=True).data
         request = self.context.get('request')
         try:
             limit = request.GET.get('recipes_limit')
         except AttributeError:
             limit = False
-        author = get_object_or_404(User, username=obj.username)
-        recipes = RecipeList.objects.filter(author=author)
+        recipes = obj.recipelist_set.all()
         if limit:
-            recipes = recipes.all()[:int(limit)]
+            recipes = recipes[:int(limit)]
         return RecipeShortSerializer(recipes, many=True).data
 
-    def get_recipes_count(self, obj):
-        """Функция подсчета числа рецептов автора"""
-        author = get_object_or_404(User, username=obj.username)
-        return RecipeList.objects.filter(author=author).count()
-
 
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор для работы с тегами."""
@@ -137,26 +141,37 @@ class IngredientReadSerializer(serializers.ModelSerializer):
     """Сериализатор для получения информации об ингредиентах.
     Используется при работе с рецептами.
     """
-    id = serializers.ReadOnlyField(
-        source='ingredient.id'
-    )
-    name = serializers.ReadOnlyField(source='ingredient.name')
-    measurement_unit = serializers.ReadOnlyField(
-        source='ingredient.measurement_unit'
-    )
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.SerializerMethodField()
+    measurement_unit = serializers.SerializerMethodField()
 
     class Meta:
         model = IngredientInRecipe
         fields = ('id', 'name', 'measurement_unit', 'amount',)
 
+    @staticmethod
+    def get_ingredient(obj):
+        """(название, единица измерения) из справочника в памяти.
+        Если ингредиента нет и в перечитанном справочнике,
+        они читаются из модели.
+        """
+        found = ingredient_catalog.get(obj.ingredient_id)
+        if found is None:
+            return obj.ingredient.name, obj.ingredient.measurement_unit
+        return found
+
+    def get_name(self, obj):
+        return self.get_ingredient(obj)[0]
+
+    def get_measurement_unit(self, obj):
+        return self.get_ingredient(obj)[1]
+
 
 class AddIngredientForRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для добавления ингредиентов.
     Используется при работе с рецептами.
     """
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientInRecipe
@@ -177,23 +192,49 @@ class GetRecipeSerializer(serializers.ModelSerializer):
         method_name='get_is_in_shopping_cart'
     )
     image = Base64ImageField(max_length=None)
+    image_renditions = serializers.SerializerMethodField(
+        method_name='get_image_renditions'
+    )
 
     class Meta:
         model = RecipeList
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time'
+                  'name', 'image', 'image_renditions', 'text', 'cooking_time'
                   )
 
-    def get_is_favorited(self, obj):
+    def get_image_renditions(self, obj):
         request = self.context.get('request')
-        return (request.user.is_authenticated
-                and obj.favorites.filter(user=request.user).exists())
+        return {
+            rendition: request.build_absolute_uri(url)
+            for rendition, url in rendition_urls(
+                obj.image, obj.rendered_image
+            ).items()
+        }
+
+    def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return ViewerContext.from_serializer_context(
+            self.context).is_favorited(obj)
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        return (request.user.is_authenticated
-                and obj.shopping_list.filter(user=request.user).exists())
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return ViewerContext.from_serializer_context(
+            self.context).is_in_shopping_cart(obj)
+
+
+class PantryRecipeSerializer(GetRecipeSerializer):
+    """Рецепт в подборке по имеющимся ингредиентам."""
+    matched_count = serializers.IntegerField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(GetRecipeSerializer.Meta):
+        fields = GetRecipeSerializer.Meta.fields + (
+            'matched_count', 'missing_count', 'coverage',
+        )
 
 
 class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
@@ -203,11 +244,7 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
     ingredients = AddIngredientForRecipeSerializer(
         many=True,
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all(),
-        error_messages={'does_not_exist': 'Такого тега не существует'}
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     cooking_time = serializers.IntegerField()
 
     class Meta:
@@ -217,20 +254,58 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
             'name', 'image', 'text', 'cooking_time')
 
     def validate_tags(self, tags):
-        tags_list = []
-        for tag in tags:
-            if not Tag.objects.filter(id=tag.id).exists():
-                raise serializers.ValidationError(
-                    'Такого тега не существует')
-        for tag in tags:
-            if tag in tags_list:
-                raise serializers.ValidationError(
-                    'Теги должны быть уникальными')
-            tags_list.append(tag)
-            if len(tags_list) < settings.MIN_AMOUNT_TAG:
-                raise serializers.ValidationError(
-                    'Выберите хотя бы один тэг')
-        return tags
+        if len(tags) < settings.MIN_AMOUNT_TAG:
+            raise serializers.ValidationError(
+                'Выберите хотя бы один тэг')
+        if len(set(tags)) != len(tags):
+            raise serializers.ValidationError(
+                'Теги должны быть уникальными')
+        found = self.find_tags(tags)
+        if len(found) != len(tags):
+            raise serializers.ValidationError(
+                'Такого тега не существует')
+        return [found[tag_id] for tag_id in tags]
+
+    def validate_ingredients(self, ingredients):
+        ingredient_ids = {ingredient['id'] for ingredient in ingredients}
+        if not ingredient_ids <= self.find_ingredient_ids(ingredient_ids):
+            raise serializers.ValidationError(
+                'Такого ингредиента не существует')
+        return ingredients
+
+    def find_tags(self, tag_ids):
+        """Теги из контекста пакетной загрузки либо одним запросом."""
+        tags = self.context.get('tags_by_id')
+        if tags is None:
+            return Tag.objects.in_bulk(tag_ids)
+        return {tag_id: tags[tag_id] for tag_id in tag_ids if tag_id in tags}
+
+    def find_ingredient_ids(self, ingredient_ids):
+        ingredients = self.context.get('ingredient_ids')
+        if ingredients is None:
+            return ingredient_catalog.existing(ingredient_ids)
+        return ingredients & ingredient_ids
+
+    @staticmethod
+    def bulk_context(items):
+        """Загружает все теги, на которые ссылаются рецепты пакета,
+        одним запросом; ингредиенты проверяются по справочнику в памяти.
+        """
+        tag_ids, ingredient_ids = set(), set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for tag_id in item.get('tags') or ():
+                if isinstance(tag_id, int):
+                    tag_ids.add(tag_id)
+            for ingredient in item.get('ingredients') or ():
+                if isinstance(ingredient, dict) and isinstance(
+                        ingredient.get('id'), int):
+                    ingredient_ids.add(ingredient['id'])
+        return {
+            'tags_by_id': Tag.objects.in_bulk(tag_ids),
+            'ingredient_ids': ingredient_catalog.existing(ingredient_ids),
+        }
 
     def validate_cooking_time(self, cooking_time):
         if cooking_time < settings.TIME_MIN_COOKING:
@@ -261,13 +336,93 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
         for ingredient_data in ingredients:
             ingredient_list.append(
                 IngredientInRecipe(
-                    ingredient=ingredient_data['id'],
+                    ingredient_id=ingredient_data['id'],
                     amount=ingredient_data['amount'],
                     recipe=recipe,
                 )
             )
         IngredientInRecipe.objects.bulk_create(ingredient_list)
 
+    @classmethod
+    def update_ingredients(cls, recipe, ingredients):
+        """Применяет к составу рецепта только разницу:
+        новые строки добавляет, изменённые обновляет, лишние удаляет.
+        Возвращает id затронутых ингредиентов.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.ingredientinrecipe.all()
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        changed = []
+        for ingredient_id, item in current.items():
+            if ingredient_id in amounts and (
+                    item.amount != amounts[ingredient_id]):
+                item.amount = amounts[ingredient_id]
+                changed.append(item)
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in current
+        ]
+        if removed:
+            IngredientInRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        IngredientInRecipe.objects.bulk_update(changed, ('amount',))
+        cls.create_ingredients(recipe, added)
+        return removed | {item.ingredient_id for item in changed} | {
+            ingredient['id'] for ingredient in added
+        }
+
+    @classmethod
+    @transaction.atomic
+    def bulk_save(cls, serializers_list, author):
+        """Сохраняет проверенные рецепты пакета несколькими bulk_create:
+        рецепты, связи с тегами и ингредиенты.
+        """
+        recipes, tag_links, ingredient_links = [], [], []
+        for serializer in serializers_list:
+            data = dict(serializer.validated_data)
+            recipes.append(RecipeList(
+                author=author,
+                **{key: value for key, value in data.items()
+                   if key not in ('tags', 'ingredients')}
+            ))
+            tag_links.append(data['tags'])
+            ingredient_links.append(data['ingredients'])
+        if connection.features.can_return_rows_from_bulk_insert:
+            RecipeList.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save()
+        RecipeList.tags.through.objects.bulk_create([
+            RecipeList.tags.through(recipelist_id=recipe.id, tag_id=tag.id)
+            for recipe, tags in zip(recipes, tag_links)
+            for tag in tags
+        ])
+        IngredientInRecipe.objects.bulk_create([
+            IngredientInRecipe(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount'],
+            )
+            for recipe, ingredients in zip(recipes, ingredient_links)
+            for ingredient in ingredients
+        ])
+        recipe_ids = [recipe.id for recipe in recipes]
+        update_ingredients_count(recipe_ids)
+        update_search_vector(recipe_ids)
+        recount('recipes_count', [author.id])
+        schedule_timeline_invalidation(recipe.author_id for recipe in recipes)
+        for recipe in recipes:
+            schedule_renditions(recipe.image)
+        return recipes
+
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request', None)
         tags = validated_data.pop('tags')
@@ -278,11 +433,13 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
         self.create_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        IngredientInRecipe.objects.filter(recipe=recipe).delete()
-        self.create_ingredients(recipe, ingredients)
+        changed_ingredients = self.update_ingredients(recipe, ingredients)
+        if changed_ingredients:
+            refresh_totals_for_recipe(recipe.id, changed_ingredients)
         recipe.tags.set(tags)
         return super().update(recipe, validated_data)
 
@@ -309,14 +466,6 @@ class FavoriteListSerializer(serializers.ModelSerializer):
         model = Favoritelist
         fields = ('user', 'recipe')
 
-    def validate(self, data):
-        user = data['user']
-        if user.favorites.filter(recipe=data['recipe']).exists():
-            raise serializers.ValidationError(
-                'Этот рецепт уже в избранном!'
-            )
-        return data
-
     def to_representation(self, instance):
         return RecipeShortSerializer(
             instance.recipe,
@@ -330,15 +479,43 @@ class ShoppingListSerializer(serializers.ModelSerializer):
         model = Shoppinglist
         fields = ('recipe', 'user')
 
-        def validate(self, data):
-            user = data['user']
-            if user.shopping_list.filter(recipe=data['recipe']).exists():
-                raise serializers.ValidationError(
-                    'Такой рецепт уже есть в корзине!'
-                )
-
     def to_representation(self, instance):
         return RecipeShortSerializer(
             instance.recipe,
             context={'request': self.context.get('request')}
         ).data
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетного добавления и удаления."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.RECIPES_BULK_MAX,
+    )
+
+    def validate_recipes(self, value):
+        recipe_ids = list(dict.fromkeys(value))
+        recipes = RecipeList.objects.in_bulk(recipe_ids)
+        missing = [
+            recipe_id for recipe_id in recipe_ids
+            if recipe_id not in recipes
+        ]
+        if missing:
+            raise ValidationError(
+                f'Рецепты не найдены: {missing}'
+            )
+        return [recipes[recipe_id] for recipe_id in recipe_ids]
+
+
+class PantrySerializer(serializers.Serializer):
+    """Параметры подборки рецептов по имеющимся ингредиентам."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.PANTRY_MAX_INGREDIENTS,
+    )
+    max_missing = serializers.IntegerField(min_value=0, allow_null=True)
+
+    def validate_ingredients(self, value):
+        return list(dict.fromkeys(value))
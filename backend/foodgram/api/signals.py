@@ -0,0 +1,14 @@
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from api.metrics import count_queries
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """Подключения создаются в каждом потоке: счётчик ставится на все.
+    Сигнал приходит при каждом переподключении той же обёртки.
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
@@ -2,8 +2,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (IngredientViewSet, MyUserViewSet, RecipeViewSet,
-                       TagViewSet)
+from api.async_views import urlpatterns as async_urlpatterns
+from api.views import (IngredientViewSet, MetricsView, MyUserViewSet,
+                       RecipeViewSet, TagViewSet)
+from foodgram import settings
 
 app_name = 'api'
 
@@ -15,7 +17,13 @@ router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
 
 
 urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router_v1.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Под ASGI горячие маршруты чтения обслуживают асинхронные обёртки,
+    # они стоят раньше маршрутов роутера с теми же именами.
+    urlpatterns = async_urlpatterns + urlpatterns
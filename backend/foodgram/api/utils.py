@@ -2,40 +2,147 @@
 import base64
 
 from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils.functional import cached_property
 from rest_framework import serializers, status
 from rest_framework.response import Response
 
+from api.metrics import timed_serializer
+from foodgram import settings
+from groceryassistant.counters import RECIPE_COUNTERS, adjust_counter, recount
+from groceryassistant.models import Favoritelist, Shoppinglist
+from users.models import Follow
+
 
 class Base64ImageField(serializers.ImageField):
-    """Класс для работы с изображениями."""
+    """Класс для работы с изображениями.
+    Строка base64 декодируется частями, превышение
+    IMAGE_MAX_SIZE прерывает разбор до декодирования остатка.
+    """
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = ContentFile(self.decode(imgstr), name='temp.' + ext)
 
         return super().to_internal_value(data)
 
+    @staticmethod
+    def decode(imgstr):
+        if len(imgstr) // 4 * 3 > settings.IMAGE_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Размер картинки больше {settings.IMAGE_MAX_SIZE} байт')
+        try:
+            return base64.b64decode(imgstr)
+        except ValueError:
+            # binascii.Error и не-ASCII символы в строке.
+            raise serializers.ValidationError('Некорректная строка base64')
+
 
-def create_model(request, instance, serializer_name):
-    """Функция для добавления ингредиентов.
-    Используется при создании/редактировании рецепта."""
-    serializer = serializer_name(
-        data={'user': request.user.id, 'recipe': instance.id, },
-        context={'request': request}
+def create_model(request, instance, serializer_name, error_message):
+    """Добавление рецепта в избранное либо список покупок.
+    Повторное добавление отсекает ограничение уникальности в базе,
+    поэтому одновременные запросы не приводят к ошибке 500.
+    """
+    model = serializer_name.Meta.model
+    try:
+        with transaction.atomic():
+            obj = model.objects.create(user=request.user, recipe=instance)
+            adjust_counter(RECIPE_COUNTERS[model], instance.id, 1)
+    except IntegrityError:
+        return Response({'errors': error_message},
+                        status=status.HTTP_400_BAD_REQUEST)
+    serializer = timed_serializer(serializer_name)(
+        obj, context={'request': request}
     )
-    serializer.is_valid(raise_exception=True)
-    serializer.save()
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 def delete_model(request, model_name, instance, error_message):
-    """Вспомогательная функция для добавления
-    рецепта в избранное либо список покупок.
+    """Удаление рецепта из избранного либо списка покупок.
+    Отсутствие записи определяется по числу удалённых строк.
     """
-    if not model_name.objects.filter(user=request.user,
-                                     recipe=instance).exists():
+    with transaction.atomic():
+        deleted, _ = model_name.objects.filter(
+            user=request.user, recipe=instance
+        ).delete()
+        if deleted:
+            adjust_counter(RECIPE_COUNTERS[model_name], instance.id, -deleted)
+    if not deleted:
         return Response({'errors': error_message},
                         status=status.HTTP_400_BAD_REQUEST)
-    model_name.objects.filter(user=request.user, recipe=instance).delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def bulk_create_model(request, model_name, recipes):
+    """Пакетное добавление рецептов в избранное либо список покупок.
+    Уже добавленные рецепты пропускаются ограничением уникальности,
+    поэтому счётчики рецептов пересчитываются, а не увеличиваются.
+    """
+    model_name.objects.bulk_create(
+        [model_name(user=request.user, recipe=recipe) for recipe in recipes],
+        ignore_conflicts=True,
+    )
+    recount(RECIPE_COUNTERS[model_name], [recipe.id for recipe in recipes])
+
+
+def bulk_delete_model(request, model_name, recipe_ids=None):
+    """Удаление рецептов из избранного либо списка покупок одним DELETE.
+    Без recipe_ids удаляются все записи пользователя.
+    """
+    queryset = model_name.objects.filter(user=request.user)
+    if recipe_ids is not None:
+        queryset = queryset.filter(recipe__in=recipe_ids)
+    else:
+        recipe_ids = list(queryset.values_list('recipe', flat=True))
+    deleted, _ = queryset.delete()
+    recount(RECIPE_COUNTERS[model_name], recipe_ids)
+    return deleted
+
+
+class ViewerContext:
+    """Избранное, корзина и подписки текущего пользователя.
+    Каждое множество загружается одним запросом при первом обращении
+    и переиспользуется всеми сериализаторами в рамках запроса.
+    """
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def from_serializer_context(cls, context):
+        request = context.get('request')
+        viewer = getattr(request, 'viewer_context', None)
+        if viewer is None:
+            viewer = cls(request.user)
+            request.viewer_context = viewer
+        return viewer
+
+    def _ids(self, model, field):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(
+            model.objects.filter(user=self.user).values_list(
+                field, flat=True
+            )
+        )
+
+    @cached_property
+    def favorite_ids(self):
+        return self._ids(Favoritelist, 'recipe_id')
+
+    @cached_property
+    def shopping_cart_ids(self):
+        return self._ids(Shoppinglist, 'recipe_id')
+
+    @cached_property
+    def following_ids(self):
+        return self._ids(Follow, 'author_id')
+
+    def is_favorited(self, recipe):
+        return recipe.id in self.favorite_ids
+
+    def is_in_shopping_cart(self, recipe):
+        return recipe.id in self.shopping_cart_ids
+
+    def is_subscribed(self, author):
+        return author.id in self.following_ids
@@ -1,37 +1,54 @@
 
-from django.db.models import Sum
-from django.http.response import HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import (IsAdminUser, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from api.caches import CachedReadMixin, ConditionalRetrieveMixin
+from api.exporters import EXPORTERS, shopping_cart_response
 from api.filtres import IngredientFilter, RecipeFilter
+from api.metrics import (PrometheusRenderer, SerializerTimingMixin, registry,
+                         timed_serializer)
+from api.paginations import CustomPagination, FeedPagination
+from api.parsers import NDJSONParser
 from api.permissions import AuthorAdminPermission
 from api.serializers import (CreateUpdateRecipeSerializer,
                              FavoriteListSerializer, FollowsListSerializer,
                              GetRecipeSerializer, IngredientSerializer,
                              MyUserCreateSerializer, MyUserListSerializer,
+                             PantryRecipeSerializer, PantrySerializer,
+                             RecipeIdsSerializer, RecipeShortSerializer,
                              ShoppingListSerializer, TagSerializer,
                              UserPasswordSerializer)
-from api.utils import create_model, delete_model
-from groceryassistant.models import (Favoritelist, Ingredient,
-                                     IngredientInRecipe, RecipeList,
-                                     Shoppinglist, Tag)
+from api.utils import (bulk_create_model, bulk_delete_model, create_model,
+                       delete_model)
+from foodgram import settings
+from groceryassistant.aggregates import refresh_cart_totals, refresh_totals
+from groceryassistant.autocomplete import ingredient_index
+from groceryassistant.feed import feed_recipe_ids
+from groceryassistant.models import (Favoritelist, Ingredient, RecipeList,
+                                     Shoppinglist, ShoppinglistTotal, Tag)
+from groceryassistant.pantry import recipes_by_pantry
 from users.models import Follow, User
 
 
-class MyUserViewSet(UserViewSet):
+class MyUserViewSet(SerializerTimingMixin, UserViewSet):
     """Управление созданием пользователя,
     cоздание/удаление подписки на пользователя.
     """
     queryset = User.objects.all()
     permission_classes = (IsAuthenticated,)
+    pagination_class = CustomPagination
 
     def get_or_create_serializer_class(self):
         if self.action == 'set_password':
@@ -59,11 +76,21 @@ class MyUserViewSet(UserViewSet):
         author = get_object_or_404(User, pk=id)
 
         if request.method == 'POST':
-            serializer = FollowsListSerializer(
-                author, data=request.data, context={'request': request}
+            serializer = self.get_serializer(
+                author, data=request.data,
+                serializer_class=FollowsListSerializer,
             )
             serializer.is_valid(raise_exception=True)
-            Follow.objects.create(user=user, author=author)
+            # Проверка в сериализаторе не защищает от одновременных
+            # запросов: повторную подписку отсекает ограничение в базе.
+            try:
+                with transaction.atomic():
+                    Follow.objects.create(user=user, author=author)
+            except IntegrityError:
+                return Response(
+                    {'errors': 'Вы уже подписаны на этого пользователя'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         get_object_or_404(
             Follow, user=user, author=author
@@ -76,15 +103,18 @@ class MyUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(following__user=user)
+        limit = request.query_params.get('recipes_limit')
+        queryset = User.objects.filter(following__user=user).with_recipes(
+            int(limit) if limit and limit.isdigit() else None
+        ).order_by(*User._meta.ordering)
         pages = self.paginate_queryset(queryset)
-        serializer = FollowsListSerializer(
-            pages, many=True, context={'request': request}
+        serializer = self.get_serializer(
+            pages, many=True, serializer_class=FollowsListSerializer
         )
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(ModelViewSet):
+class TagViewSet(CachedReadMixin, SerializerTimingMixin, ModelViewSet):
     """Получение информации о тегах."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
@@ -92,17 +122,37 @@ class TagViewSet(ModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReadMixin, SerializerTimingMixin,
+                        ReadOnlyModelViewSet):
     """Представления ингридиентов."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (IngredientFilter,)
     permission_classes = (IsAuthenticatedOrReadOnly,)
-    search_fields = ('^name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, self.search, *args, **kwargs)
 
-class RecipeViewSet(ModelViewSet):
+    def search(self, request, *args, **kwargs):
+        """Автодополнение по названию с необязательным параметром limit.
+        При INGREDIENT_INDEX_ENABLED ответ строится по индексу в памяти.
+        """
+        limit = request.query_params.get('limit')
+        limit = (min(int(limit), settings.INGREDIENT_SEARCH_MAX_LIMIT)
+                 if limit and limit.isdigit() else None)
+        if settings.INGREDIENT_INDEX_ENABLED:
+            return Response(ingredient_index.search(
+                request.query_params.get(IngredientFilter.search_param, ''),
+                limit
+            ))
+        queryset = self.filter_queryset(self.get_queryset())[:limit]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class RecipeViewSet(ConditionalRetrieveMixin, SerializerTimingMixin,
+                    ModelViewSet):
     """Работа с рецептами. Создание/изменение/удаление рецепта.
     Получение информации о рецептах.
     Добавление рецептов в избранное и список покупок.
@@ -112,12 +162,117 @@ class RecipeViewSet(ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = [AuthorAdminPermission]
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return queryset.for_read(self.request.user)
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return GetRecipeSerializer
         return CreateUpdateRecipeSerializer
 
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, от новых к старым.
+        Список id читается из ленты в кеше, рецепты страницы
+        загружаются одним запросом.
+        """
+        pages = self.paginate_queryset(feed_recipe_ids(request.user.id))
+        recipes = RecipeList.objects.for_read(request.user).in_bulk(pages)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in pages if pk in recipes],
+            many=True, serializer_class=GetRecipeSerializer,
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['GET'],
+    )
+    def pantry(self, request):
+        """Что приготовить из имеющегося: ?ingredients=1&ingredients=2.
+        Рецепты упорядочены по доле имеющихся ингредиентов и числу
+        недостающих; max_missing ограничивает число недостающих.
+        Фильтры списка рецептов (tags, author и др.) тоже применяются.
+        """
+        params = PantrySerializer(data={
+            'ingredients': [
+                value for values in request.query_params.getlist(
+                    'ingredients') for value in values.split(',')
+            ],
+            'max_missing': request.query_params.get('max_missing'),
+        })
+        params.is_valid(raise_exception=True)
+        queryset = recipes_by_pantry(
+            self.filter_queryset(
+                RecipeList.objects.for_read(request.user)
+            ),
+            params.validated_data['ingredients'],
+            params.validated_data['max_missing'],
+        )
+        pages = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(
+            pages, many=True, serializer_class=PantryRecipeSerializer
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk(self, request):
+        """Пакетное создание рецептов из JSON-массива или NDJSON.
+        Возвращает результат по каждому рецепту пакета.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'errors': 'Ожидается непустой список рецептов'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.RECIPES_BULK_MAX:
+            return Response(
+                {'errors': 'Не более {} рецептов за запрос'.format(
+                    settings.RECIPES_BULK_MAX)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        context = self.get_serializer_context()
+        context.update(CreateUpdateRecipeSerializer.bulk_context(items))
+        serializers_list = [
+            CreateUpdateRecipeSerializer(data=item, context=context)
+            for item in items
+        ]
+        valid = [
+            serializer for serializer in serializers_list
+            if serializer.is_valid()
+        ]
+        recipes = iter(
+            CreateUpdateRecipeSerializer.bulk_save(valid, request.user)
+        )
+        results = []
+        for serializer in serializers_list:
+            if serializer.errors:
+                results.append({'errors': serializer.errors})
+            else:
+                recipe = next(recipes)
+                results.append({'id': recipe.id, 'name': recipe.name})
+        return Response(
+            results,
+            status=(status.HTTP_201_CREATED if valid
+                    else status.HTTP_400_BAD_REQUEST)
+        )
+
     @action(
         detail=True,
         methods=['POST', 'DELETE'],
@@ -128,10 +283,11 @@ class RecipeViewSet(ModelViewSet):
         Удаление/добавление в избранное.
         """
         recipe = get_object_or_404(RecipeList, id=pk)
-        error_message = 'В избранном нет этого рецепта'
         if request.method == 'POST':
-            return create_model(request, recipe, FavoriteListSerializer)
-        return delete_model(request, Favoritelist, recipe, error_message)
+            return create_model(request, recipe, FavoriteListSerializer,
+                                'Этот рецепт уже в избранном!')
+        return delete_model(request, Favoritelist, recipe,
+                            'В избранном нет этого рецепта')
 
     @action(
         detail=True,
@@ -140,13 +296,83 @@ class RecipeViewSet(ModelViewSet):
     )
     def shopping_cart(self, request, pk):
         """Работа со списком покупок.
-        Удаление/добавление в список покупок.
+        Удаление/добавление в список покупок. Изменение списка и пересчёт
+        итогов выполняются в одной транзакции.
         """
         recipe = get_object_or_404(RecipeList, id=pk)
-        error_message = 'Нет такого рецепта в списке покупок'
+        with transaction.atomic():
+            if request.method == 'POST':
+                response = create_model(
+                    request, recipe, ShoppingListSerializer,
+                    'Такой рецепт уже есть в корзине!'
+                )
+            else:
+                response = delete_model(
+                    request, Shoppinglist, recipe,
+                    'Нет такого рецепта в списке покупок'
+                )
+            if status.is_success(response.status_code):
+                refresh_cart_totals(request.user.id, [recipe.id])
+        return response
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_mutation(request, model_name):
+        """Пакетное добавление (POST) или удаление (DELETE) рецептов."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.validated_data['recipes']
+        recipe_ids = [recipe.id for recipe in recipes]
         if request.method == 'POST':
-            return create_model(request, recipe, ShoppingListSerializer)
-        return delete_model(request, Shoppinglist, recipe, error_message)
+            bulk_create_model(request, model_name, recipes)
+            response = Response(
+                timed_serializer(RecipeShortSerializer)(
+                    recipes, many=True, context={'request': request}
+                ).data,
+                status=status.HTTP_201_CREATED
+            )
+        else:
+            bulk_delete_model(request, model_name, recipe_ids)
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+        if model_name is Shoppinglist:
+            refresh_cart_totals(request.user.id, recipe_ids)
+        return response
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        url_path='favorite/bulk',
+        url_name='favorite-bulk',
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_bulk(self, request):
+        """Пакетная работа с избранным: {"recipes": [1, 2, 3]}."""
+        return self.bulk_mutation(request, Favoritelist)
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        url_path='shopping_cart/bulk',
+        url_name='shopping-cart-bulk',
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_bulk(self, request):
+        """Пакетная работа со списком покупок: {"recipes": [1, 2, 3]}."""
+        return self.bulk_mutation(request, Shoppinglist)
+
+    @action(
+        detail=False,
+        methods=['DELETE'],
+        url_path='shopping_cart/clear',
+        url_name='shopping-cart-clear',
+        permission_classes=[IsAuthenticated],
+    )
+    def clear_shopping_cart(self, request):
+        """Очистка списка покупок."""
+        with transaction.atomic():
+            bulk_delete_model(request, Shoppinglist)
+            refresh_totals(users=[request.user.id])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
         detail=False,
@@ -154,19 +380,35 @@ class RecipeViewSet(ModelViewSet):
         permission_classes=[IsAuthenticated],
     )
     def download_shopping_cart(self, request):
-        """Отправка файла со списком покупок."""
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe__shopping_list__user=request.user
+        """Отправка файла со списком покупок.
+        Формат выбирается параметром file_format: txt, csv, json или pdf.
+        """
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format not in EXPORTERS:
+            return Response(
+                {'errors': f'Неподдерживаемый формат файла: {file_format}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ingredients = ShoppinglistTotal.objects.filter(
+            user=request.user
         ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(ingredient_amount=Sum('amount'))
-        shopping_list = ['Список покупок:\n']
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            unit = ingredient['ingredient__measurement_unit']
-            amount = ingredient['ingredient_amount']
-            shopping_list.append(f'\n{name} - {amount}, {unit}')
-        response = HttpResponse(shopping_list, content_type='text/plain')
-        response['Content-Disposition'] = ('attachment;'
-                                           'filename="shopping_cart.txt"')
-        return response
+            'ingredient__name', 'ingredient__measurement_unit',
+            ingredient_amount=F('total_amount'),
+        ).order_by('ingredient__name')
+        return shopping_cart_response(ingredients, file_format)
+
+
+class MetricsView(APIView):
+    """Статистика запросов по представлениям: число запросов к базе
+    и перцентили времени. Данные собираются в памяти каждого процесса.
+    Только для персонала; ?format=prometheus отдаёт текстовый формат.
+    """
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (JSONRenderer, PrometheusRenderer)
+
+    def get(self, request):
+        return Response({'views': registry.snapshot()})
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
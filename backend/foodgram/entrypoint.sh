@@ -1,8 +1,12 @@
 #!/bin/sh
 
 
-python manage.py makemigrations;
 python manage.py migrate;
 python manage.py collectstatic --noinput;
 python manage.py import_csv;
-gunicorn --bind ${GUNICORN_HOST}:${GUNICORN_PORT} foodgram.wsgi;
\ No newline at end of file
+if [ "$ASGI" = "true" ]; then
+    gunicorn --bind ${GUNICORN_HOST}:${GUNICORN_PORT} \
+        --worker-class uvicorn.workers.UvicornWorker foodgram.asgi;
+else
+    gunicorn --bind ${GUNICORN_HOST}:${GUNICORN_PORT} foodgram.wsgi;
+fi
\ No newline at end of file
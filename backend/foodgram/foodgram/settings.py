@@ -22,6 +22,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # Регистрирует OpClass для функциональных индексов PostgreSQL.
+    'django.contrib.postgres',
 
     'rest_framework',
     'django_filters',
@@ -35,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,16 +71,43 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 # Database
 
-DATABASES = {
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.postgresql')
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+    # Покрывающие индексы (INCLUDE) SQLite создаёт без неключевых колонок.
+    SILENCED_SYSTEM_CHECKS = ['models.W040']
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('POSTGRES_DB', 'django'),
+            'USER': os.getenv('POSTGRES_USER', 'django'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', 5432)
+        }
+    }
+
+
+# Cache
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB', 'django'),
-        'USER': os.getenv('POSTGRES_USER', 'django'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
-        'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'BACKEND': os.getenv('CACHE_BACKEND', LOCMEM_CACHE),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
+# Сброс версий таблиц и лент в LocMemCache виден только текущему
+# процессу, поэтому без общего кеша записи живут CACHE_LOCAL_TIMEOUT.
+CACHE_SHARED = CACHES['default']['BACKEND'] != LOCMEM_CACHE
+CACHE_LOCAL_TIMEOUT = 60
 
 
 # Password validation
@@ -165,6 +195,7 @@ SLUG_LENGTH = 50
 COLOR_LENGTH = 7
 # groceryassistant.serializers.py
 MIN_AMOUNT_TAG = 1
+RECIPES_BULK_MAX = 500
 MIN_AMOUNT_INGREDIENT = 1
 TIME_MIN_COOKING = 1
 TIME_MAX_COOKING = 600
@@ -174,10 +205,108 @@ REGEX_FOR_TAG_SLUG = re.compile(r'^[-a-zA-Z0-9_]+$')
 FORBIDDEN_LOGIN = 'me'
 MIN_AMOUNT = 1
 # groceryassistant.management.commands.import_csv.py
-SUCCESS_IMPORT = 'Импорт файла ingredients.csv завершен успешно!'
-DUPLICATE_INGREDIENTS = 'Такие ингредиенты уже есть!'
+SUCCESS_IMPORT = 'Импорт файла {} завершен успешно!'
+IMPORT_REPORT = ('Прочитано строк: {}, добавлено: {}, пропущено: {}, '
+                 'скорость: {:.0f} строк/с')
 ERROR_FIND_FILE = 'Отсутствует файл ingredients в директории backend/data'
-PATH = str(BASE_DIR.joinpath('/foodgram/data').resolve()) + '/'
+ERROR_FILE_FORMAT = 'Поддерживаются только файлы .csv и .json: {}'
+ERROR_BATCH_SIZE = 'Размер пакета должен быть положительным числом'
+ERROR_COPY = 'Загрузка через COPY доступна только для PostgreSQL и CSV'
+IMPORT_BATCH_SIZE = 1000
+PATH = str(BASE_DIR / 'data') + '/'
 FILENAME = 'ingredients.csv'
+# groceryassistant.management.commands.*_shopping_totals.py
+TOTALS_REBUILT = 'Итоги списков покупок пересчитаны, записей: {}'
+TOTALS_CONSISTENT = 'Итоги списков покупок совпадают с исходными данными'
+TOTALS_INCONSISTENT = 'Найдено расхождений в итогах списков покупок: {}'
+TOTALS_MISMATCH = ('Пользователь {}, ингредиент {}: '
+                   'ожидалось {}, сохранено {}')
+# groceryassistant.seed.py
+SEED_BATCH_SIZE = 1000
+SEED_PASSWORD = 'seed-password'
+SEED_IMAGE = 'groceryassistant/images/seed.jpg'
+# groceryassistant.management.commands.generate_data.py
+GENERATE_USERS = 2000
+GENERATE_RECIPES = 5000
+GENERATE_REPORT = ('Создано за {:.1f} с: пользователей {users}, '
+                   'рецептов {recipes}, тегов {tags}, '
+                   'ингредиентов в справочнике {ingredients}')
+ERROR_GENERATE_SIZE = ('Количества должны быть неотрицательными, а '
+                       'пользователей, рецептов и тегов — не меньше одного')
+ERROR_GENERATE_SHARE = 'Доля авторов должна быть в пределах (0, 1]'
+ERROR_GENERATE_PREFIX = 'Пользователи с префиксом {} уже есть, задайте --prefix'
+# groceryassistant.management.commands.benchmark_api.py
+BENCHMARK_REQUESTS = 200
+BENCHMARK_CONCURRENCY = 8
+BENCHMARK_HEADER = '{:<44} {:>6} {:>6} {:>8} {:>8} {:>8} {:>8}'.format(
+    'endpoint', 'req', 'err', 'rps', 'p50 ms', 'p95 ms', 'p99 ms'
+)
+BENCHMARK_ROW = ('{name:<44} {requests:>6} {errors:>6} {rps:>8.1f} '
+                 '{p50:>8.1f} {p95:>8.1f} {p99:>8.1f}')
+# groceryassistant.management.commands.benchmark_http.py
+BENCHMARK_HTTP_URL = 'http://localhost:8000'
+BENCHMARK_HTTP_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?tags=breakfast&tags=lunch',
+    '/api/ingredients/?name=аб',
+    '/api/tags/',
+)
+BENCHMARK_HTTP_CONCURRENCY = [1, 8, 32, 64]
+BENCHMARK_HTTP_TIMEOUT = 30
+ERROR_BENCHMARK_SIZE = 'Число запросов и потоков должно быть положительным'
+ERROR_BENCHMARK_DATA = 'Нет данных для прогона: запустите generate_data'
+ERROR_BENCHMARK_ENDPOINT = 'Неизвестные маршруты: {}'
+# groceryassistant.search.py
+SEARCH_CONFIG = 'russian'
+SEARCH_REBUILT = 'Поисковые векторы пересчитаны, рецептов: {}'
+SEARCH_UNSUPPORTED = 'Полнотекстовый индекс доступен только в PostgreSQL'
+# groceryassistant.pantry.py, api.serializers.py
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_COUNTS_REBUILT = 'Количество ингредиентов пересчитано, рецептов: {}'
+# groceryassistant.management.commands.reconcile_counters.py
+COUNTERS_REPORT = '{}: расходящихся строк {}'
+COUNTERS_CONSISTENT = 'Счётчики совпадают с исходными данными'
+COUNTERS_INCONSISTENT = 'Найдено расхождений в счётчиках: {}'
+COUNTERS_RECONCILED = 'Счётчики сверены и исправлены'
+# groceryassistant.feed.py
+FEED_TIMELINE_LENGTH = 500
+FEED_TIMELINE_TTL = 60 * 60 if CACHE_SHARED else CACHE_LOCAL_TIMEOUT
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+# groceryassistant.autocomplete.py, groceryassistant.catalog.py
+INGREDIENT_INDEX_ENABLED = True
+INGREDIENT_CATALOG_CHECK_INTERVAL = 5
+INGREDIENT_CATALOG_MAX_AGE = 10 * 60
+INGREDIENT_SEARCH_MAX_LIMIT = 100
+# groceryassistant.images.py, api.utils.py
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_NAME_LENGTH = 100
+IMAGE_RENDITIONS = {
+    'thumb': (320, 320),
+    'card': (640, 640),
+    'full': (1600, 1600),
+}
+IMAGE_QUALITY = 80
+IMAGE_WORKERS = 2
+# api.paginations.py
+MAX_PAGE_SIZE = 100
+# api.caches.py
+REFERENCE_CACHE_TIMEOUT = 60 * 60 if CACHE_SHARED else CACHE_LOCAL_TIMEOUT
+# groceryassistant.versions.py
+TABLE_VERSION_TIMEOUT = None if CACHE_SHARED else CACHE_LOCAL_TIMEOUT
+# api.urls.py, api.async_views.py
+ASYNC_READ_VIEWS = os.getenv('ASGI', 'false').lower() == 'true'
+# api.metrics.py
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_WINDOW = 1000
+METRICS_QUANTILES = {'p50': 0.5, 'p95': 0.95, 'p99': 0.99}
+# api.exporters.py
+SHOPPING_CART_CHUNK_SIZE = 2000
+SHOPPING_CART_FILENAME = 'shopping_cart'
+PDF_FONT_PATH = BASE_DIR / 'api' / 'fonts' / 'DejaVuSans.ttf'
+PDF_FONT_SIZE = 12
+PDF_TITLE_SIZE = 16
+PDF_MARGIN = 50
+PDF_SPOOL_SIZE = 1024 * 1024
+PDF_CHUNK_SIZE = 64 * 1024
 # groceryassistant.admin.py
 EMPTY = '-пусто-'
@@ -2,9 +2,14 @@
 from django.contrib import admin
 
 from foodgram import settings
+from groceryassistant.aggregates import (refresh_totals,
+                                         refresh_totals_for_recipe)
+from groceryassistant.counters import RECIPE_COUNTERS, recount
 from groceryassistant.models import (Favoritelist, Ingredient,
                                      IngredientInRecipe, RecipeList,
-                                     Shoppinglist, Tag)
+                                     Shoppinglist, ShoppinglistTotal, Tag)
+from groceryassistant.pantry import schedule_ingredients_count_update
+from groceryassistant.search import schedule_search_update
 
 
 @admin.register(Ingredient)
@@ -34,10 +39,23 @@ class IngredientInRecipeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'recipe', 'ingredient', 'amount')
     empty_value_display = settings.EMPTY
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_totals_for_recipe(obj.recipe_id, ingredients=None)
+        schedule_search_update(obj.recipe_id)
+        schedule_ingredients_count_update(obj.recipe_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_totals_for_recipe(obj.recipe_id, ingredients=None)
+        schedule_search_update(obj.recipe_id)
+        schedule_ingredients_count_update(obj.recipe_id)
+
 
 @admin.register(RecipeList)
 class RecipeListAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'author', 'favorites_quantity')
+    list_display = ('pk', 'name', 'author', 'pub_date',
+                    'favorites_count', 'cart_count')
     search_fields = ('name', 'author', 'tags')
     list_filter = ('name', 'author', 'tags')
     inlines = [
@@ -45,19 +63,75 @@ class RecipeListAdmin(admin.ModelAdmin):
     ]
     empty_value_display = settings.EMPTY
 
-    def favorites_quantity(self, obj):
-        return obj.favorites.count()
+    def save_model(self, request, obj, form, change):
+        authors = {obj.author_id}
+        if change:
+            authors.add(RecipeList.objects.get(pk=obj.pk).author_id)
+        super().save_model(request, obj, form, change)
+        if change:
+            recount('recipes_count', authors)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_totals_for_recipe(form.instance.id, ingredients=None)
+
+
+class RecipeCounterAdmin(admin.ModelAdmin):
+    """Пересчёт счётчика рецептов после правок избранного
+    и списка покупок через админку.
+    """
+    def recount_recipes(self, recipes):
+        recount(RECIPE_COUNTERS[self.model], recipes)
+
+    def save_model(self, request, obj, form, change):
+        recipes = {obj.recipe_id}
+        if change:
+            recipes.add(self.model.objects.get(pk=obj.pk).recipe_id)
+        super().save_model(request, obj, form, change)
+        self.recount_recipes(recipes)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.recount_recipes([obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        recipes = set(queryset.values_list('recipe', flat=True))
+        super().delete_queryset(request, queryset)
+        self.recount_recipes(recipes)
 
 
 @admin.register(Favoritelist)
-class FavoritelistAdmin(admin.ModelAdmin):
+class FavoritelistAdmin(RecipeCounterAdmin):
     list_display = ('pk', 'user', 'recipe')
     search_fields = ('user', 'recipe')
     empty_value_display = settings.EMPTY
 
 
 @admin.register(Shoppinglist)
-class ShoppinglistAdmin(admin.ModelAdmin):
+class ShoppinglistAdmin(RecipeCounterAdmin):
     list_display = ('pk', 'user', 'recipe')
     search_fields = ('user', 'recipe')
     empty_value_display = settings.EMPTY
+
+    def save_model(self, request, obj, form, change):
+        users = {obj.user_id}
+        if change:
+            users.add(Shoppinglist.objects.get(pk=obj.pk).user_id)
+        super().save_model(request, obj, form, change)
+        refresh_totals(users=users)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_totals(users=[obj.user_id])
+
+    def delete_queryset(self, request, queryset):
+        users = set(queryset.values_list('user', flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_totals(users=users)
+
+
+@admin.register(ShoppinglistTotal)
+class ShoppinglistTotalAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'ingredient', 'total_amount')
+    search_fields = ('user__username', 'ingredient__name')
+    empty_value_display = settings.EMPTY
@@ -0,0 +1,106 @@
+
+from django.db import transaction
+from django.db.models import Sum
+
+from groceryassistant.models import (IngredientInRecipe, Shoppinglist,
+                                     ShoppinglistTotal)
+from users.models import User
+
+
+def calculate_totals(users=None, ingredients=None):
+    """Агрегирует ингредиенты списков покупок по исходным таблицам.
+    users и ingredients — списки id либо подзапросы .values().
+    """
+    lookups = {'recipe__shopping_list__isnull': False}
+    if users is not None:
+        lookups['recipe__shopping_list__user__in'] = users
+    if ingredients is not None:
+        lookups['ingredient__in'] = ingredients
+    # Один вызов filter(), чтобы все условия шли по одному JOIN.
+    return IngredientInRecipe.objects.filter(**lookups).values(
+        'recipe__shopping_list__user', 'ingredient'
+    ).annotate(total_amount=Sum('amount')).order_by()
+
+
+def lock_users(users=None):
+    """Блокирует строки пользователей до конца транзакции и возвращает
+    их id. Пересчёты итогов одних и тех же пользователей выполняются
+    по очереди: следующий видит строки, вставленные предыдущим.
+    """
+    queryset = User.objects.all()
+    if users is not None:
+        queryset = queryset.filter(pk__in=users)
+    return list(
+        queryset.select_for_update().order_by('pk').values_list(
+            'pk', flat=True
+        )
+    )
+
+
+def refresh_totals(users=None, ingredients=None):
+    """Пересчитывает итоги только для затронутых пользователей
+    и ингредиентов. Без аргументов перестраивает таблицу целиком.
+    """
+    with transaction.atomic():
+        locked = lock_users(users)
+        totals = ShoppinglistTotal.objects.all()
+        if users is not None:
+            users = locked
+            totals = totals.filter(user__in=users)
+        if ingredients is not None:
+            totals = totals.filter(ingredient__in=ingredients)
+        totals.delete()
+        ShoppinglistTotal.objects.bulk_create(
+            [
+                ShoppinglistTotal(
+                    user_id=row['recipe__shopping_list__user'],
+                    ingredient_id=row['ingredient'],
+                    total_amount=row['total_amount'],
+                )
+                for row in calculate_totals(users, ingredients)
+            ],
+        )
+
+
+def refresh_totals_for_recipe(recipe_id, ingredients):
+    """Пересчитывает итоги у всех, у кого рецепт в списке покупок.
+    ingredients=None пересчитывает эти корзины целиком.
+    """
+    refresh_totals(
+        users=Shoppinglist.objects.filter(recipe=recipe_id).values('user'),
+        ingredients=ingredients,
+    )
+
+
+def refresh_cart_totals(user_id, recipe_ids):
+    """Пересчитывает итоги пользователя после добавления или удаления
+    рецептов из списка покупок.
+    """
+    refresh_totals(
+        users=[user_id],
+        ingredients=IngredientInRecipe.objects.filter(
+            recipe__in=recipe_ids
+        ).values('ingredient'),
+    )
+
+
+def find_inconsistencies():
+    """Сравнивает сохранённые итоги с расчётом по исходным таблицам.
+    Возвращает словарь {(user_id, ingredient_id): (ожидалось, сохранено)}.
+    """
+    expected = {
+        (row['recipe__shopping_list__user'], row['ingredient']):
+            row['total_amount']
+        for row in calculate_totals()
+    }
+    stored = {
+        (row['user'], row['ingredient']): row['total_amount']
+        for row in ShoppinglistTotal.objects.values(
+            'user', 'ingredient', 'total_amount'
+        )
+    }
+    return {
+        key: (expected.get(key), stored.get(key))
+        for key in expected.keys() | stored.keys()
+        if expected.get(key) != stored.get(key)
+    }
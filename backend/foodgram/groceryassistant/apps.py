@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GroceryassistantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'groceryassistant'
+
+    def ready(self):
+        import groceryassistant.signals  # noqa: F401
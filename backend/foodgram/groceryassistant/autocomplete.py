@@ -0,0 +1,59 @@
+
+import bisect
+import threading
+
+from groceryassistant.catalog import ingredient_catalog
+
+
+class IngredientIndex:
+    """Отсортированный индекс названий ингредиентов в памяти процесса.
+    Строится из снимка справочника ingredient_catalog и перестраивается,
+    когда справочник загружает новый снимок.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = (None, (), ())
+
+    def _get_entries(self):
+        """Ключи и записи индекса одной публикацией: читатель видит
+        либо старую пару целиком, либо новую.
+        """
+        snapshot = ingredient_catalog.snapshot()
+        state = self._state
+        if state[0] is not snapshot:
+            with self._lock:
+                state = self._state
+                if state[0] is not snapshot:
+                    entries = tuple(sorted(
+                        (name.casefold(), pk, name, unit)
+                        for pk, name, unit in snapshot.entries()
+                    ))
+                    state = (
+                        snapshot,
+                        tuple(entry[0] for entry in entries),
+                        entries,
+                    )
+                    self._state = state
+        return state[1], state[2]
+
+    def search(self, query, limit=None):
+        """Совпадения по началу названия, затем по вхождению."""
+        keys, entries = self._get_entries()
+        query = query.casefold()
+        start = bisect.bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        found = list(entries[start:end])
+        if limit is None or len(found) < limit:
+            found += [
+                entry for entry in entries[:start] + entries[end:]
+                if query in entry[0]
+            ]
+        return [
+            {'id': pk, 'name': name, 'measurement_unit': unit}
+            for _, pk, name, unit in found[:limit]
+        ]
+
+
+ingredient_index = IngredientIndex()
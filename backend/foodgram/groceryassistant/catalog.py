@@ -0,0 +1,130 @@
+
+import bisect
+import threading
+import time
+from array import array
+
+from foodgram import settings
+from groceryassistant.models import Ingredient
+from groceryassistant.versions import get_table_version
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок справочника ингредиентов.
+    id хранятся отсортированным массивом, единицы измерения — номерами
+    в кортеже различных единиц: их в справочнике несколько десятков.
+    """
+    __slots__ = ('token', 'ids', 'names', 'unit_numbers', 'units')
+
+    def __init__(self, token, rows):
+        units = {}
+        self.token = token
+        self.ids = array('q')
+        self.unit_numbers = array('H')
+        names = []
+        for pk, name, unit in rows:
+            self.ids.append(pk)
+            names.append(name)
+            self.unit_numbers.append(units.setdefault(unit, len(units)))
+        self.names = tuple(names)
+        self.units = tuple(units)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, pk):
+        index = bisect.bisect_left(self.ids, pk)
+        if index < len(self.ids) and self.ids[index] == pk:
+            return index
+        return None
+
+    def get(self, pk):
+        """(название, единица измерения) либо None."""
+        index = self.position(pk)
+        if index is None:
+            return None
+        return self.names[index], self.units[self.unit_numbers[index]]
+
+    def entries(self):
+        """Все ингредиенты как (id, название, единица измерения)."""
+        return [
+            (pk, name, self.units[number])
+            for pk, name, number in zip(
+                self.ids, self.names, self.unit_numbers
+            )
+        ]
+
+
+class IngredientCatalog:
+    """Справочник ингредиентов в памяти процесса.
+    Загружается при первом обращении одним запросом. Изменения
+    в этом процессе сбрасывают его сигналами, изменения в других
+    воркерах — через версию таблицы в кеше, которая проверяется
+    не чаще раза в INGREDIENT_CATALOG_CHECK_INTERVAL секунд. Изменения,
+    не сменившие версию (например, прямо в базе), подхватываются
+    перезагрузкой раз в INGREDIENT_CATALOG_MAX_AGE секунд.
+    """
+    __slots__ = ('_lock', '_snapshot', '_checked_at', '_loaded_at')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0
+        self._loaded_at = 0
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _is_stale(self, snapshot):
+        if snapshot is None:
+            return True
+        now = time.monotonic()
+        if now - self._loaded_at > settings.INGREDIENT_CATALOG_MAX_AGE:
+            return True
+        if now - self._checked_at < settings.INGREDIENT_CATALOG_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        return get_table_version(Ingredient)[0] != snapshot.token
+
+    def snapshot(self, reload=False):
+        snapshot = self._snapshot
+        if reload or self._is_stale(snapshot):
+            with self._lock:
+                if reload or self._snapshot is snapshot:
+                    token = get_table_version(Ingredient)[0]
+                    self._snapshot = CatalogSnapshot(
+                        token,
+                        Ingredient.objects.order_by('id').values_list(
+                            'id', 'name', 'measurement_unit'
+                        ),
+                    )
+                    self._checked_at = self._loaded_at = time.monotonic()
+                snapshot = self._snapshot
+        return snapshot
+
+    def get(self, pk):
+        """(название, единица измерения) ингредиента. Ингредиента,
+        добавленного в другом воркере после загрузки, в снимке нет:
+        тогда справочник перечитывается один раз.
+        """
+        found = self.snapshot().get(pk)
+        if found is None:
+            found = self.snapshot(reload=True).get(pk)
+        return found
+
+    def existing(self, ingredient_ids):
+        """Подмножество существующих id. Отсутствующие в снимке
+        проверяются запросом к базе, обычно их нет.
+        """
+        snapshot = self.snapshot()
+        found = {
+            pk for pk in ingredient_ids if snapshot.position(pk) is not None
+        }
+        missing = set(ingredient_ids) - found
+        if missing:
+            found |= set(Ingredient.objects.filter(
+                id__in=missing).values_list('id', flat=True))
+        return found
+
+
+ingredient_catalog = IngredientCatalog()
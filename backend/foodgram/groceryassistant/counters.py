@@ -0,0 +1,79 @@
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from groceryassistant.models import Favoritelist, RecipeList, Shoppinglist
+from users.models import Follow, User
+
+# Счётчик: (модель со счётчиком, исходная модель, поле связи).
+COUNTERS = {
+    'favorites_count': (RecipeList, Favoritelist, 'recipe'),
+    'cart_count': (RecipeList, Shoppinglist, 'recipe'),
+    'recipes_count': (User, RecipeList, 'author'),
+    'followers_count': (User, Follow, 'author'),
+}
+RECIPE_COUNTERS = {
+    Favoritelist: 'favorites_count',
+    Shoppinglist: 'cart_count',
+}
+AUTHOR_COUNTERS = {
+    RecipeList: 'recipes_count',
+    Follow: 'followers_count',
+}
+
+
+def counted(field):
+    """Подзапрос с фактическим значением счётчика по исходной таблице."""
+    _, source, key = COUNTERS[field]
+    return Coalesce(
+        Subquery(
+            source.objects.filter(
+                **{key: OuterRef('pk')}
+            ).order_by().values(key).annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        Value(0),
+    )
+
+
+def adjust_counter(field, pk, delta):
+    """Изменяет счётчик на delta выражением F() в одном UPDATE,
+    поэтому одновременные изменения не теряются. Значение не опускается
+    ниже нуля, даже если счётчик разошёлся с исходной таблицей.
+    """
+    model = COUNTERS[field][0]
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def recount(field, pks=None):
+    """Пересчитывает счётчик по исходной таблице одним UPDATE.
+    pks — список id либо подзапрос .values(); None — все строки.
+    Используется там, где число изменённых строк заранее неизвестно.
+    """
+    queryset = COUNTERS[field][0].objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(**{field: counted(field)})
+
+
+def stale_rows(field):
+    """Строки, в которых счётчик расходится с исходной таблицей."""
+    return COUNTERS[field][0].objects.annotate(
+        expected=counted(field)
+    ).exclude(**{field: F('expected')})
+
+
+def reconcile_counters(fix=True):
+    """Находит расхождения всех счётчиков и при fix=True исправляет их.
+    Возвращает число расходящихся строк по каждому счётчику.
+    """
+    result = {}
+    for field in COUNTERS:
+        pks = list(stale_rows(field).values_list('pk', flat=True))
+        if pks and fix:
+            recount(field, pks)
+        result[field] = len(pks)
+    return result
@@ -0,0 +1,87 @@
+
+from django.core.cache import cache
+from django.db import transaction
+
+from foodgram import settings
+from groceryassistant.models import RecipeList
+from users.models import Follow
+
+
+def timeline_key(user_id):
+    return f'timeline:{user_id}'
+
+
+def timeline_entry(pub_date, recipe_id):
+    """Элемент ленты: сортируется так же, как RecipeList.Meta.ordering."""
+    return (pub_date.timestamp(), recipe_id)
+
+
+def recent_entries(authors):
+    """Последние рецепты авторов одним запросом по индексу автора."""
+    if not authors:
+        return []
+    return [
+        timeline_entry(pub_date, recipe_id)
+        for pub_date, recipe_id in RecipeList.objects.filter(
+            author__in=authors
+        ).values_list('pub_date', 'id')[:settings.FEED_TIMELINE_LENGTH]
+    ]
+
+
+def build_timeline(user_id):
+    """Собирает ленту по подпискам, когда её нет в кеше.
+    Рецепты авторов с числом подписчиков больше FEED_FANOUT_MAX_FOLLOWERS
+    в ленту не записываются: их id хранятся отдельно и читаются
+    при каждом запросе ленты.
+    """
+    regular, popular = [], []
+    for author_id, followers in Follow.objects.filter(
+            user=user_id).values_list('author', 'author__followers_count'):
+        if followers > settings.FEED_FANOUT_MAX_FOLLOWERS:
+            popular.append(author_id)
+        else:
+            regular.append(author_id)
+    timeline = {'entries': recent_entries(regular), 'popular': popular}
+    cache.set(timeline_key(user_id), timeline, settings.FEED_TIMELINE_TTL)
+    return timeline
+
+
+def feed_recipe_ids(user_id):
+    """id рецептов ленты пользователя от новых к старым:
+    одно чтение из кеша и запрос по популярным авторам, если они есть.
+    """
+    timeline = cache.get(timeline_key(user_id))
+    if timeline is None:
+        timeline = build_timeline(user_id)
+    entries = timeline['entries']
+    if timeline['popular']:
+        entries = sorted(
+            set(entries) | set(recent_entries(timeline['popular'])),
+            reverse=True,
+        )[:settings.FEED_TIMELINE_LENGTH]
+    return [recipe_id for _, recipe_id in entries]
+
+
+def invalidate_timelines(user_ids):
+    cache.delete_many([timeline_key(user_id) for user_id in user_ids])
+
+
+def invalidate_follower_timelines(author_ids):
+    """Ленты подписчиков авторов собираются заново при следующем чтении.
+    Одно удаление ключей вместо чтения и перезаписи лент: запись,
+    сделанная параллельно, не затирается. Рецептов популярных авторов
+    в лентах нет, их ленты не трогаются.
+    """
+    invalidate_timelines(
+        Follow.objects.filter(
+            author__in=author_ids,
+            author__followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).values_list('user', flat=True)
+    )
+
+
+def schedule_timeline_invalidation(author_ids):
+    author_ids = set(author_ids)
+    transaction.on_commit(
+        lambda: invalidate_follower_timelines(author_ids)
+    )
@@ -0,0 +1,119 @@
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, connection, transaction
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps, features
+
+from foodgram import settings
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS,
+    thread_name_prefix='image-renditions',
+)
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """Хранилище, именующее файлы по хешу содержимого.
+    Одинаковые картинки сохраняются один раз, а неизменяемые имена
+    позволяют кешировать их в браузере и nginx без ограничения срока.
+    """
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        name = os.path.join(
+            directory,
+            digest.hexdigest()[:32] + os.path.splitext(filename)[1].lower()
+        )
+        if self.exists(name):
+            return name
+        return self.save_exact(name, content, max_length)
+
+    def save_exact(self, name, content, max_length=None):
+        """Сохранение под заданным именем, без замены на хеш."""
+        return super().save(name, content, max_length)
+
+
+def rendition_format():
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def rendition_name(name, rendition):
+    """Имя уменьшенной копии: images/ab12.png -> images/ab12.thumb.webp"""
+    return '{}.{}.{}'.format(
+        os.path.splitext(name)[0], rendition, rendition_format()[1]
+    )
+
+
+def render_renditions(storage, name):
+    """Создаёт уменьшенные копии картинки для всех IMAGE_RENDITIONS."""
+    image_format, _ = rendition_format()
+    with storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert('RGBA' if image_format == 'WEBP' else 'RGB')
+    for rendition, size in settings.IMAGE_RENDITIONS.items():
+        target = rendition_name(name, rendition)
+        if storage.exists(target):
+            continue
+        copy = image.copy()
+        copy.thumbnail(size)
+        buffer = BytesIO()
+        copy.save(buffer, image_format, quality=settings.IMAGE_QUALITY)
+        storage.save_exact(target, ContentFile(buffer.getvalue()))
+
+
+def _render_safely(model, storage, name):
+    """Создаёт копии и отмечает их готовность у всех записей
+    с этой картинкой: одинаковые картинки хранятся одним файлом.
+    Поток пула живёт дольше запроса, поэтому подключение к базе
+    проверяется перед работой и закрывается после неё.
+    """
+    close_old_connections()
+    try:
+        render_renditions(storage, name)
+        model.objects.filter(image=name).update(rendered_image=name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_renditions(image):
+    """Ставит обработку картинки в фоновый пул после фиксации транзакции,
+    чтобы ответ на запрос не ждал перекодирования. Модель картинки
+    хранит имя обработанной картинки в поле rendered_image.
+    """
+    if not image or image.instance.rendered_image == image.name:
+        return
+    model, storage, name = type(image.instance), image.storage, image.name
+    transaction.on_commit(
+        lambda: executor.submit(_render_safely, model, storage, name)
+    )
+
+
+def rendition_urls(image, rendered_image):
+    """Ссылки на копии, если они готовы для этой картинки, иначе
+    на оригинал. Хранилище при этом не опрашивается.
+    """
+    if not image:
+        return {}
+    if rendered_image != image.name:
+        return dict.fromkeys(settings.IMAGE_RENDITIONS, image.url)
+    return {
+        rendition: image.storage.url(rendition_name(image.name, rendition))
+        for rendition in settings.IMAGE_RENDITIONS
+    }
@@ -0,0 +1,121 @@
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+
+from api.metrics import percentile
+from foodgram import settings
+from groceryassistant.models import Ingredient, RecipeList, Tag
+from groceryassistant.seed import budget_requests
+from users.models import User
+
+
+def client_worker(url, viewer):
+    """Последовательные запросы тестового клиента в одном потоке."""
+    def worker(count):
+        client = APIClient()
+        client.force_authenticate(viewer)
+        latencies, errors = [], 0
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+        finally:
+            connection.close()
+        return latencies, errors
+    return worker
+
+
+def run_concurrently(worker, total, concurrency):
+    """Распределяет total запросов по concurrency потокам.
+    worker(count) возвращает задержки в секундах и число ошибок.
+    """
+    shares = [
+        total // concurrency + (number < total % concurrency)
+        for number in range(concurrency)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, shares))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(
+        latency for worker_latencies, _ in results
+        for latency in worker_latencies
+    )
+    return {
+        'requests': total,
+        'errors': sum(errors for _, errors in results),
+        'rps': total / elapsed,
+        **{
+            name: percentile(latencies, fraction) * 1000
+            for name, fraction in settings.METRICS_QUANTILES.items()
+        },
+    }
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон API в процессе через тестовый клиент.
+    Запросы к каждому маршруту выполняются в нескольких потоках,
+    по маршрутам выводятся пропускная способность и перцентили задержки.
+    Данные берутся из текущей базы: сначала запустите generate_data.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=settings.BENCHMARK_REQUESTS,
+            help='Запросов к каждому маршруту',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.BENCHMARK_CONCURRENCY,
+            help='Число параллельных потоков',
+        )
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Прогнать только указанные маршруты (можно повторять)',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError(settings.ERROR_BENCHMARK_SIZE)
+        viewer = User.objects.filter(
+            follower__isnull=False, shopping_list__isnull=False
+        ).first()
+        author = User.objects.filter(recipelist__isnull=False).first()
+        recipe = RecipeList.objects.first()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.first()
+        if None in (viewer, author, recipe, tag, ingredient):
+            raise CommandError(settings.ERROR_BENCHMARK_DATA)
+        endpoints = budget_requests(
+            author, recipe, tag,
+            list(Tag.objects.values_list('slug', flat=True)[:2]),
+            ingredient,
+        )
+        unknown = set(options['endpoints'] or ()) - set(endpoints)
+        if unknown:
+            raise CommandError(settings.ERROR_BENCHMARK_ENDPOINT.format(
+                ', '.join(sorted(unknown))
+            ))
+        setup_test_environment()
+        self.stdout.write(settings.BENCHMARK_HEADER)
+        for name, url in endpoints.items():
+            if options['endpoints'] and name not in options['endpoints']:
+                continue
+            result = run_concurrently(
+                client_worker(
+                    url, None if name.endswith('-anonymous') else viewer
+                ),
+                options['requests'],
+                options['concurrency'],
+            )
+            self.stdout.write(
+                settings.BENCHMARK_ROW.format(name=name, **result)
+            )
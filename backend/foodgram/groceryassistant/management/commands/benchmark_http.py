@@ -0,0 +1,78 @@
+
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram import settings
+from groceryassistant.management.commands.benchmark_api import run_concurrently
+
+
+def http_worker(url, token):
+    """Последовательные HTTP-запросы одного потока через keep-alive."""
+    def worker(count):
+        session = requests.Session()
+        if token:
+            session.headers['Authorization'] = f'Token {token}'
+        latencies, errors = [], 0
+        with session:
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    response = session.get(
+                        url, timeout=settings.BENCHMARK_HTTP_TIMEOUT
+                    )
+                    ok = response.status_code == 200
+                except requests.RequestException:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+        return latencies, errors
+    return worker
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон запущенного сервера по HTTP.
+    Для каждого маршрута и уровня параллельности выводятся пропускная
+    способность и перцентили задержки. Запустите команду против сервера
+    под WSGI (ASGI=false) и под ASGI (ASGI=true), чтобы сравнить их.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default=settings.BENCHMARK_HTTP_URL,
+            help='Адрес сервера',
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Маршрут для прогона (можно повторять)',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+',
+            default=settings.BENCHMARK_HTTP_CONCURRENCY,
+            help='Уровни параллельности',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=settings.BENCHMARK_REQUESTS,
+            help='Запросов на каждый маршрут и уровень',
+        )
+        parser.add_argument(
+            '--token', default='',
+            help='Токен пользователя для заголовка Authorization',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or min(options['concurrency']) < 1:
+            raise CommandError(settings.ERROR_BENCHMARK_SIZE)
+        self.stdout.write(settings.BENCHMARK_HEADER)
+        for path in options['paths'] or settings.BENCHMARK_HTTP_PATHS:
+            for concurrency in options['concurrency']:
+                result = run_concurrently(
+                    http_worker(
+                        options['url'].rstrip('/') + path, options['token']
+                    ),
+                    options['requests'],
+                    concurrency,
+                )
+                self.stdout.write(settings.BENCHMARK_ROW.format(
+                    name=f'{path} x{concurrency}', **result
+                ))
@@ -0,0 +1,23 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram import settings
+from groceryassistant.aggregates import find_inconsistencies
+
+
+class Command(BaseCommand):
+    """Проверка итогов списков покупок на расхождение с исходными данными."""
+    def handle(self, *args, **kwargs):
+        inconsistencies = find_inconsistencies()
+        for (user, ingredient), (expected, stored) in sorted(
+                inconsistencies.items()):
+            self.stdout.write(
+                settings.TOTALS_MISMATCH.format(
+                    user, ingredient, expected, stored
+                )
+            )
+        if inconsistencies:
+            raise CommandError(
+                settings.TOTALS_INCONSISTENT.format(len(inconsistencies))
+            )
+        self.stdout.write(self.style.SUCCESS(settings.TOTALS_CONSISTENT))
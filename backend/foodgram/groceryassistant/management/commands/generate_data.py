@@ -0,0 +1,86 @@
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram import settings
+from groceryassistant.seed import SEED_TAGS, seed_database
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Наполнение базы синтетическими данными для нагрузочных тестов.
+    Ингредиенты берутся из настоящего справочника data/ingredients.csv.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=settings.GENERATE_USERS,
+            help='Количество пользователей',
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=settings.GENERATE_RECIPES,
+            help='Количество рецептов',
+        )
+        parser.add_argument(
+            '--tags', type=int, default=len(SEED_TAGS),
+            help='Количество тегов',
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок на одного пользователя',
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=5,
+            help='Избранных рецептов на одного пользователя',
+        )
+        parser.add_argument(
+            '--cart', type=int, default=5,
+            help='Рецептов в списке покупок одного пользователя',
+        )
+        parser.add_argument(
+            '--authors-share', type=float, default=0.2,
+            help='Доля пользователей, публикующих рецепты',
+        )
+        parser.add_argument(
+            '--path', default=settings.PATH + settings.FILENAME,
+            help='Путь к ingredients.csv, если справочник пуст',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён создаваемых пользователей',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел',
+        )
+
+    def handle(self, *args, **options):
+        if (min(options[name] for name in ('users', 'recipes', 'tags')) < 1
+                or min(options[name]
+                       for name in ('follows', 'favorites', 'cart')) < 0):
+            raise CommandError(settings.ERROR_GENERATE_SIZE)
+        if not 0 < options['authors_share'] <= 1:
+            raise CommandError(settings.ERROR_GENERATE_SHARE)
+        if User.objects.filter(
+                username__startswith=options['prefix']).exists():
+            raise CommandError(
+                settings.ERROR_GENERATE_PREFIX.format(options['prefix'])
+            )
+        started = time.monotonic()
+        created = seed_database(
+            users=options['users'],
+            recipes=options['recipes'],
+            tags=options['tags'],
+            follows=options['follows'],
+            favorites=options['favorites'],
+            cart=options['cart'],
+            authors_share=options['authors_share'],
+            ingredients_path=options['path'],
+            prefix=options['prefix'],
+            random_seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            settings.GENERATE_REPORT.format(
+                time.monotonic() - started, **created
+            )
+        ))
@@ -1,34 +1,187 @@
 
 import csv
+import json
+import os
+import time
+from itertools import islice
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import IntegrityError
+from django.db import connection, transaction
 
 from foodgram import settings
 from groceryassistant.models import Ingredient
+from groceryassistant.versions import bump_table_version
+
+
+def read_csv(file):
+    """Построчное чтение пар (название, единица измерения) из CSV."""
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0].strip(), row[1].strip()
+
+
+def read_json(file):
+    """Чтение пар (название, единица измерения) из JSON.
+    В стандартной библиотеке нет потокового парсера, поэтому
+    файл разбирается целиком, а строки отдаются по одной.
+    """
+    for item in json.load(file):
+        yield item['name'].strip(), item['measurement_unit'].strip()
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class CSVStream:
+    """Источник для COPY: пары из rows кодируются в CSV по мере чтения.
+    Так COPY получает строки, уже нормализованные read_csv, и загружает
+    те же названия, что и пакетная вставка.
+    """
+    def __init__(self, rows):
+        writer = csv.writer(self)
+        self.lines = (writer.writerow(row) for row in rows)
+        self.buffer = ''
+
+    @staticmethod
+    def write(line):
+        return line
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer += line
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
 
 
 class Command(BaseCommand):
-    """Загрузка в базу ингредиентов из файла CSV."""
-    def handle(self, *args, **kwargs):
+    """Загрузка в базу ингредиентов из файла CSV или JSON."""
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.PATH + settings.FILENAME,
+            help='Путь к файлу ingredients.csv или ingredients.json',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.IMPORT_BATCH_SIZE,
+            help='Количество строк в одном INSERT',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только разобрать файл и подсчитать новые строки',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загрузка через COPY (только PostgreSQL и CSV)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in READERS:
+            raise CommandError(settings.ERROR_FILE_FORMAT.format(path))
+        if options['batch_size'] < 1:
+            raise CommandError(settings.ERROR_BATCH_SIZE)
+        if options['copy'] and (connection.vendor != 'postgresql'
+                                or extension != '.csv'):
+            raise CommandError(settings.ERROR_COPY)
+        started = time.monotonic()
         try:
-            with open(
-                    settings.PATH + settings.FILENAME,
-                    'r', encoding='utf-8') as file:
-                raise CommandError(settings.ERROR_FIND_FILE)
-            reader = csv.reader(file)
-            for row in reader:
-                data = [
-                    Ingredient(
-                        name=row[0],
-                        measurement_unit=row[1],
+            with open(path, 'r', encoding='utf-8') as file:
+                rows = READERS[extension](file)
+                if options['dry_run']:
+                    read, inserted = self.count_new(rows)
+                elif options['copy']:
+                    read, inserted = self.copy(rows)
+                else:
+                    read, inserted = self.bulk_insert(
+                        rows, options['batch_size']
                     )
-                ]
-                Ingredient.objects.bulk_create(data)
-        except (FileNotFoundError, IntegrityError):
-            return settings.DUPLICATE_INGREDIENTS
+        except FileNotFoundError:
+            raise CommandError(settings.ERROR_FIND_FILE)
+        elapsed = max(time.monotonic() - started, 1e-6)
         self.stdout.write(
-            self.style.SUCCESS(
-                settings.SUCCESS_IMPORT.format(settings.FILENAME)
+            settings.IMPORT_REPORT.format(
+                read, inserted, read - inserted, read / elapsed
+            )
+        )
+        if not options['dry_run']:
+            # bulk_create и COPY не отправляют сигналы post_save.
+            bump_table_version(Ingredient)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    settings.SUCCESS_IMPORT.format(os.path.basename(path))
+                )
             )
+
+    @staticmethod
+    def count_new(rows):
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
         )
+        before = len(existing)
+        read = 0
+        for row in rows:
+            read += 1
+            existing.add(row)
+        return read, len(existing) - before
+
+    @staticmethod
+    def bulk_insert(rows, batch_size):
+        """Пакетная вставка; дубликаты отсекает unique_name_measurement."""
+        read = 0
+        before = Ingredient.objects.count()
+        with transaction.atomic():
+            for batch in batches(rows, batch_size):
+                read += len(batch)
+                Ingredient.objects.bulk_create(
+                    [
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+        return read, Ingredient.objects.count() - before
+
+    @staticmethod
+    def copy(rows):
+        """COPY во временную таблицу и перенос с ON CONFLICT DO NOTHING."""
+        table = Ingredient._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredient_import '
+                '(name varchar, measurement_unit varchar) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_import FROM STDIN WITH CSV', CSVStream(rows)
+            )
+            cursor.execute('SELECT COUNT(*) FROM ingredient_import')
+            read = cursor.fetchone()[0]
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_import '
+                'ON CONFLICT DO NOTHING'
+            )
+            inserted = cursor.rowcount
+        return read, inserted
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from foodgram import settings
+from groceryassistant.models import RecipeList
+from groceryassistant.pantry import update_ingredients_count
+
+
+class Command(BaseCommand):
+    """Полный пересчёт количества ингредиентов в рецептах."""
+    def handle(self, *args, **kwargs):
+        update_ingredients_count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                settings.PANTRY_COUNTS_REBUILT.format(
+                    RecipeList.objects.count()
+                )
+            )
+        )
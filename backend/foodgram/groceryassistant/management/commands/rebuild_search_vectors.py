@@ -0,0 +1,19 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram import settings
+from groceryassistant.models import RecipeList
+from groceryassistant.search import full_text_enabled, update_search_vector
+
+
+class Command(BaseCommand):
+    """Полный пересчёт поисковых векторов рецептов."""
+    def handle(self, *args, **kwargs):
+        if not full_text_enabled():
+            raise CommandError(settings.SEARCH_UNSUPPORTED)
+        update_search_vector()
+        self.stdout.write(
+            self.style.SUCCESS(
+                settings.SEARCH_REBUILT.format(RecipeList.objects.count())
+            )
+        )
@@ -0,0 +1,19 @@
+
+from django.core.management.base import BaseCommand
+
+from foodgram import settings
+from groceryassistant.aggregates import refresh_totals
+from groceryassistant.models import ShoppinglistTotal
+
+
+class Command(BaseCommand):
+    """Полный пересчёт итогов списков покупок по исходным таблицам."""
+    def handle(self, *args, **kwargs):
+        refresh_totals()
+        self.stdout.write(
+            self.style.SUCCESS(
+                settings.TOTALS_REBUILT.format(
+                    ShoppinglistTotal.objects.count()
+                )
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram import settings
+from groceryassistant.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Сверка счётчиков рецептов и авторов с исходными таблицами.
+    Расходящиеся строки пересчитываются; с --check только выводятся,
+    и команда завершается ошибкой при наличии расхождений.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить, не исправляя',
+        )
+
+    def handle(self, *args, **options):
+        stale = reconcile_counters(fix=not options['check'])
+        for field, count in stale.items():
+            self.stdout.write(settings.COUNTERS_REPORT.format(field, count))
+        if options['check'] and any(stale.values()):
+            raise CommandError(
+                settings.COUNTERS_INCONSISTENT.format(sum(stale.values()))
+            )
+        self.stdout.write(self.style.SUCCESS(
+            settings.COUNTERS_CONSISTENT if options['check']
+            else settings.COUNTERS_RECONCILED
+        ))
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_pub_date(apps, schema_editor):
+    """0003 дал всем существующим рецептам одну дату — момент миграции.
+    Настоящей даты создания в базе нет, поэтому даты восстанавливаются
+    по порядку id: рецепт с меньшим id получает более раннюю дату,
+    с шагом в секунду назад от момента миграции.
+    """
+    RecipeList = apps.get_model('groceryassistant', 'RecipeList')
+    stamp = RecipeList.objects.order_by('id').values_list(
+        'pub_date', flat=True
+    ).first()
+    recipes = list(RecipeList.objects.filter(pub_date=stamp).only(
+        'id', 'pub_date'
+    ).order_by('-id'))
+    for offset, recipe in enumerate(recipes):
+        recipe.pub_date = stamp - timedelta(seconds=offset)
+    RecipeList.objects.bulk_update(recipes, ['pub_date'], BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groceryassistant', '0003_recipe_performance'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_pub_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Счётчик: (модель со счётчиком, исходная модель, поле связи),
+# как в groceryassistant.counters.COUNTERS.
+COUNTERS = {
+    'favorites_count': (
+        ('groceryassistant', 'RecipeList'),
+        ('groceryassistant', 'Favoritelist'),
+        'recipe',
+    ),
+    'cart_count': (
+        ('groceryassistant', 'RecipeList'),
+        ('groceryassistant', 'Shoppinglist'),
+        'recipe',
+    ),
+    'recipes_count': (
+        ('users', 'User'),
+        ('groceryassistant', 'RecipeList'),
+        'author',
+    ),
+    'followers_count': (
+        ('users', 'User'),
+        ('users', 'Follow'),
+        'author',
+    ),
+}
+
+
+def backfill_counters(apps, schema_editor):
+    """Счётчики добавлены со значением 0 и без пересчёта существующих
+    строк: пересчитывает каждый одним UPDATE по исходной таблице.
+    """
+    for field, (target, source, key) in COUNTERS.items():
+        source = apps.get_model(*source)
+        apps.get_model(*target).objects.update(**{field: Coalesce(
+            Subquery(
+                source.objects.filter(
+                    **{key: OuterRef('pk')}
+                ).order_by().values(key).annotate(
+                    count=Count('pk')
+                ).values('count')
+            ),
+            Value(0),
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groceryassistant', '0004_backfill_recipe_pub_date'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
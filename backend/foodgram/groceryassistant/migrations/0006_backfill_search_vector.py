@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_search_vector(apps, schema_editor):
+    """search_vector существующих рецептов одним UPDATE,
+    как в groceryassistant.search.update_search_vector.
+    Вне PostgreSQL поиск идёт без вектора, заполнять нечего.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    RecipeList = apps.get_model('groceryassistant', 'RecipeList')
+    IngredientInRecipe = apps.get_model(
+        'groceryassistant', 'IngredientInRecipe'
+    )
+    ingredient_names = Coalesce(
+        Subquery(
+            IngredientInRecipe.objects.filter(
+                recipe=OuterRef('pk')
+            ).values('recipe').annotate(
+                names=StringAgg('ingredient__name', ' ')
+            ).values('names')
+        ),
+        Value(''),
+    )
+    config = settings.SEARCH_CONFIG
+    RecipeList.objects.update(search_vector=(
+        SearchVector('name', weight='A', config=config)
+        + SearchVector(ingredient_names, weight='B', config=config)
+        + SearchVector('text', weight='C', config=config)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groceryassistant', '0005_backfill_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_search_vector, migrations.RunPython.noop
+        ),
+    ]
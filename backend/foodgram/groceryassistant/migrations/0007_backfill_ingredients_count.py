@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_ingredients_count(apps, schema_editor):
+    """ingredients_count существующих рецептов одним UPDATE,
+    как в groceryassistant.pantry.update_ingredients_count.
+    """
+    RecipeList = apps.get_model('groceryassistant', 'RecipeList')
+    IngredientInRecipe = apps.get_model(
+        'groceryassistant', 'IngredientInRecipe'
+    )
+    RecipeList.objects.update(ingredients_count=Coalesce(
+        Subquery(
+            IngredientInRecipe.objects.filter(
+                recipe=OuterRef('pk')
+            ).values('recipe').annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groceryassistant', '0006_backfill_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_ingredients_count, migrations.RunPython.noop
+        ),
+    ]
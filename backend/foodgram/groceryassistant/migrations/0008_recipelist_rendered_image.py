@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+from groceryassistant.images import rendition_name
+
+
+def backfill_rendered_image(apps, schema_editor):
+    """Отмечает картинки, копии которых уже лежат в хранилище.
+    Проверка файлов выполняется один раз на каждую картинку здесь,
+    а не при каждой выдаче рецепта.
+    """
+    RecipeList = apps.get_model('groceryassistant', 'RecipeList')
+    storage = RecipeList._meta.get_field('image').storage
+    names = RecipeList.objects.exclude(image='').values_list(
+        'image', flat=True
+    ).distinct()
+    for name in names:
+        if all(
+            storage.exists(rendition_name(name, rendition))
+            for rendition in settings.IMAGE_RENDITIONS
+        ):
+            RecipeList.objects.filter(image=name).update(rendered_image=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groceryassistant', '0007_backfill_ingredients_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipelist',
+            name='rendered_image',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Картинка с готовыми копиями'),
+        ),
+        migrations.RunPython(
+            backfill_rendered_image, migrations.RunPython.noop
+        ),
+    ]
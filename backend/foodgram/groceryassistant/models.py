@@ -1,7 +1,13 @@
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 from foodgram import settings
+from groceryassistant.images import ContentHashStorage
 from groceryassistant.validators import (validate_cooking_time,
                                          validate_forbidden_characters)
 from users.models import User
@@ -50,6 +56,14 @@ class Ingredient(models.Model):
             models.UniqueConstraint(
                 fields=('name', 'measurement_unit'),
                 name='unique_name_measurement')]
+        # Поиск по вхождению: UPPER(name) LIKE '%X%' (icontains)
+        # по триграммам. Создаётся только в PostgreSQL,
+        # см. groceryassistant.operations.
+        indexes = [
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='ingredient_name_trgm_idx'),
+        ]
 
     def __str__(self):
         return (
@@ -58,6 +72,44 @@ class Ingredient(models.Model):
         )
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов рецептов без N+1 при сериализации."""
+    def with_related(self, user):
+        """Подгружает автора, теги и ингредиенты фиксированным
+        числом запросов вне зависимости от размера страницы.
+        """
+        return self.prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.with_subscription(user),
+            ),
+            'tags',
+            # Названия и единицы ингредиентов берутся из
+            # groceryassistant.catalog без соединения с таблицей.
+            'ingredientinrecipe',
+        )
+
+    def with_user_flags(self, user):
+        """Аннотирует флаги is_favorited и is_in_shopping_cart."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favoritelist.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Shoppinglist.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    def for_read(self, user):
+        """Полный план запроса для выдачи рецептов пользователю."""
+        return self.with_related(user).with_user_flags(user)
+
+
 class RecipeList(models.Model):
     """Класс, описывающий модель рецептов."""
     tags = models.ManyToManyField(
@@ -84,7 +136,16 @@ class RecipeList(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='groceryassistant/images/',
+        storage=ContentHashStorage(),
+        blank=True,
+    )
+    # Имя картинки, для которой готовы уменьшенные копии: ссылки на них
+    # выдаются без проверки файлов в хранилище.
+    rendered_image = models.CharField(
+        verbose_name='Картинка с готовыми копиями',
+        max_length=settings.IMAGE_NAME_LENGTH,
         blank=True,
+        editable=False,
     )
     text = models.TextField(
         verbose_name='Описание блюда',
@@ -94,10 +155,54 @@ class RecipeList(models.Model):
         verbose_name='Время приготовления в минутах',
         validators=[validate_cooking_time],
     )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        default=timezone.now,
+    )
+    ingredients_count = models.PositiveIntegerField(
+        verbose_name='Количество ингредиентов',
+        default=0,
+        editable=False,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    cart_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = 'Рецепты'
         verbose_name = 'Рецепт'
+        # Стабильный порядок для постраничной и курсорной навигации,
+        # обслуживается индексом recipe_pub_date_idx.
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_idx'),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx'),
+            models.Index(
+                fields=('-favorites_count', '-cart_count', '-pub_date', '-id'),
+                name='recipe_popularity_idx'),
+            # Создаётся только в PostgreSQL, см. groceryassistant.operations.
+            GinIndex(
+                fields=('search_vector',),
+                name='recipe_search_idx'),
+        ]
 
     def __str__(self):
         return f'Автор: {self.author} рецепт: {self.name}'
@@ -128,6 +233,14 @@ class IngredientInRecipe(models.Model):
             models.UniqueConstraint(
                 fields=('ingredient', 'recipe'),
                 name='unique ingredient')]
+        indexes = [
+            # Покрывающий индекс для чтения состава рецепта
+            # и суммирования количества без обращения к таблице.
+            models.Index(
+                fields=('recipe', 'ingredient'),
+                include=('amount',),
+                name='ingredient_in_recipe_idx'),
+        ]
 
     def __str__(self):
         return f'{self.amount} {self.ingredient}'
@@ -155,6 +268,13 @@ class Favoritelist(models.Model):
             models.UniqueConstraint(
                 fields=('user', 'recipe'),
                 name='unique favoritelist')]
+        # Уникальное ограничение индексирует (user, recipe),
+        # обратный индекс нужен для соединений со стороны рецепта.
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favoritelist_recipe_user_idx'),
+        ]
 
     def __str__(self):
         return (
@@ -185,9 +305,48 @@ class Shoppinglist(models.Model):
             models.UniqueConstraint(
                 fields=('user', 'recipe'),
                 name='unique recipe shoppinglist')]
+        # Уникальное ограничение индексирует (user, recipe),
+        # обратный индекс нужен для соединений со стороны рецепта.
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shoppinglist_recipe_user_idx'),
+        ]
 
     def __str__(self):
         return (
             f'Пользователь: {self.user} добавил'
             f'{self.recipe.name} в список покупок'
         )
+
+
+class ShoppinglistTotal(models.Model):
+    """Суммарное количество ингредиента в списке покупок пользователя.
+    Поддерживается в актуальном состоянии groceryassistant.aggregates.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_totals',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_totals',
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Общее количество',
+    )
+
+    class Meta:
+        verbose_name_plural = 'Итоги списков покупок'
+        verbose_name = 'Итог списка покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique shoppinglist total')]
+
+    def __str__(self):
+        return f'{self.user}: {self.total_amount} {self.ingredient}'
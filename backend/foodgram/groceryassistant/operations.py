@@ -0,0 +1,22 @@
+
+from django.db.migrations.operations import AddIndex
+
+
+class PostgresAddIndex(AddIndex):
+    """Индекс, который создаётся только в PostgreSQL (GIN, классы
+    операторов). В состоянии миграций он есть всегда, поэтому
+    makemigrations не зависит от того, к какой базе подключён проект.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
@@ -0,0 +1,57 @@
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+
+from groceryassistant.models import IngredientInRecipe, RecipeList
+
+
+def update_ingredients_count(recipes=None):
+    """Пересчитывает ingredients_count одним UPDATE.
+    recipes — список id либо подзапрос .values(); None — все рецепты.
+    """
+    queryset = RecipeList.objects.all()
+    if recipes is not None:
+        queryset = queryset.filter(pk__in=recipes)
+    queryset.update(ingredients_count=Coalesce(
+        Subquery(
+            IngredientInRecipe.objects.filter(
+                recipe=OuterRef('pk')
+            ).values('recipe').annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        Value(0),
+    ))
+
+
+def schedule_ingredients_count_update(recipe_id):
+    """Пересчёт после фиксации транзакции, когда ингредиенты
+    рецепта уже сохранены.
+    """
+    transaction.on_commit(lambda: update_ingredients_count([recipe_id]))
+
+
+def recipes_by_pantry(queryset, ingredient_ids, max_missing=None):
+    """Рецепты, в которых есть хотя бы один ингредиент из ingredient_ids,
+    по убыванию доли имеющихся ингредиентов и возрастанию недостающих.
+    Совпадения считает GROUP BY по индексу (ingredient, recipe),
+    знаменатель берётся из ingredients_count без подсчёта по рецептам.
+    """
+    queryset = queryset.filter(
+        ingredients_count__gt=0,
+        ingredientinrecipe__ingredient__in=ingredient_ids,
+    ).annotate(
+        matched_count=Count('ingredientinrecipe'),
+    ).annotate(
+        missing_count=F('ingredients_count') - F('matched_count'),
+        coverage=(
+            Cast('matched_count', FloatField())
+            / Cast('ingredients_count', FloatField())
+        ),
+    )
+    if max_missing is not None:
+        queryset = queryset.filter(missing_count__lte=max_missing)
+    return queryset.order_by(
+        '-coverage', 'missing_count', *RecipeList._meta.ordering
+    )
@@ -0,0 +1,81 @@
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, transaction
+from django.db.models import (BooleanField, Case, Exists, F, OuterRef, Q,
+                              Subquery, Value, When)
+from django.db.models.functions import Coalesce
+
+from foodgram import settings
+from groceryassistant.models import IngredientInRecipe, RecipeList
+
+
+def full_text_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def ingredient_names():
+    """Названия ингредиентов рецепта одной строкой."""
+    return Coalesce(
+        Subquery(
+            IngredientInRecipe.objects.filter(
+                recipe=OuterRef('pk')
+            ).values('recipe').annotate(
+                names=StringAgg('ingredient__name', ' ')
+            ).values('names')
+        ),
+        Value(''),
+    )
+
+
+def update_search_vector(recipes=None):
+    """Пересчитывает search_vector одним UPDATE.
+    recipes — список id либо подзапрос .values(); None — все рецепты.
+    Вне PostgreSQL ничего не делает: там поиск идёт без индекса.
+    """
+    if not full_text_enabled():
+        return
+    queryset = RecipeList.objects.all()
+    if recipes is not None:
+        queryset = queryset.filter(pk__in=recipes)
+    config = settings.SEARCH_CONFIG
+    queryset.update(search_vector=(
+        SearchVector('name', weight='A', config=config)
+        + SearchVector(ingredient_names(), weight='B', config=config)
+        + SearchVector('text', weight='C', config=config)
+    ))
+
+
+def schedule_search_update(recipe_id):
+    """Пересчёт после фиксации транзакции, когда ингредиенты
+    рецепта уже сохранены.
+    """
+    transaction.on_commit(lambda: update_search_vector([recipe_id]))
+
+
+def search_recipes(queryset, text):
+    """Рецепты, подходящие под запрос, по убыванию релевантности."""
+    ordering = RecipeList._meta.ordering
+    if full_text_enabled():
+        query = SearchQuery(
+            text, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', *ordering)
+    # Запасной вариант для SQLite: вхождение подстроки,
+    # совпадения в названии выше остальных.
+    return queryset.filter(
+        Q(name__icontains=text)
+        | Q(text__icontains=text)
+        | Exists(IngredientInRecipe.objects.filter(
+            recipe=OuterRef('pk'), ingredient__name__icontains=text
+        ))
+    ).annotate(
+        in_name=Case(
+            When(name__icontains=text, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    ).order_by('-in_name', *ordering)
@@ -0,0 +1,220 @@
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from foodgram import settings
+from groceryassistant.aggregates import refresh_totals
+from groceryassistant.counters import recount
+from groceryassistant.management.commands.import_csv import read_csv
+from groceryassistant.models import (Favoritelist, Ingredient,
+                                     IngredientInRecipe, RecipeList,
+                                     Shoppinglist, Tag)
+from groceryassistant.pantry import update_ingredients_count
+from groceryassistant.search import update_search_vector
+from groceryassistant.versions import bump_table_version
+from users.models import Follow, User
+
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F9A62B', 'dessert'),
+    ('Выпечка', '#C06C84', 'bakery'),
+    ('Суп', '#355C7D', 'soup'),
+)
+
+
+def bulk_create_ids(model, objs):
+    """bulk_create с возвратом id созданных строк.
+    SQLite в Django 3.2 не возвращает id из пакетной вставки, поэтому
+    они читаются последними строками таблицы внутри той же транзакции.
+    """
+    model.objects.bulk_create(objs, batch_size=settings.SEED_BATCH_SIZE)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [obj.pk for obj in objs]
+    return sorted(
+        model.objects.order_by('-pk').values_list('pk', flat=True)[:len(objs)]
+    )
+
+
+def seed_ingredients(path):
+    """Справочник ингредиентов из data/ingredients.csv."""
+    if not Ingredient.objects.exists():
+        with open(path, 'r', encoding='utf-8') as file:
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in read_csv(file)
+                ],
+                batch_size=settings.SEED_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+    return list(Ingredient.objects.values_list('id', flat=True))
+
+
+def seed_tags(count):
+    """Теги из SEED_TAGS, сверх них — пронумерованные."""
+    tags = [
+        Tag(name=name, color=color, slug=slug)
+        for name, color, slug in SEED_TAGS[:count]
+    ]
+    tags += [
+        Tag(name=f'Тег {number}', color='#777777', slug=f'tag-{number}')
+        for number in range(len(tags), count)
+    ]
+    Tag.objects.bulk_create(tags, ignore_conflicts=True)
+    return list(
+        Tag.objects.filter(
+            slug__in=[tag.slug for tag in tags]
+        ).values_list('id', flat=True)
+    )
+
+
+def seed_users(count, prefix):
+    password = make_password(settings.SEED_PASSWORD)
+    return bulk_create_ids(User, [
+        User(
+            username=f'{prefix}{number}',
+            email=f'{prefix}{number}@example.com',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password,
+        )
+        for number in range(count)
+    ])
+
+
+def seed_recipes(rng, count, author_ids, tag_ids, ingredient_ids):
+    now = timezone.now()
+    recipe_ids = bulk_create_ids(RecipeList, [
+        RecipeList(
+            author_id=rng.choice(author_ids),
+            name=f'Рецепт {number}',
+            text='Описание рецепта',
+            image=settings.SEED_IMAGE,
+            cooking_time=rng.randint(5, 120),
+            pub_date=now - timedelta(minutes=rng.randint(0, 525600)),
+        )
+        for number in range(count)
+    ])
+    through = RecipeList.tags.through
+    through.objects.bulk_create(
+        [
+            through(recipelist_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(
+                tag_ids, rng.randint(1, min(3, len(tag_ids)))
+            )
+        ],
+        batch_size=settings.SEED_BATCH_SIZE,
+    )
+    IngredientInRecipe.objects.bulk_create(
+        [
+            IngredientInRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(ingredient_ids, rng.randint(3, 10))
+        ],
+        batch_size=settings.SEED_BATCH_SIZE,
+    )
+    return recipe_ids
+
+
+def seed_user_links(rng, user_ids, author_ids, recipe_ids, options):
+    """Подписки, избранное и списки покупок каждого пользователя."""
+    follows, favorites, carts = [], [], []
+    for user_id in user_ids:
+        authors = [author for author in author_ids if author != user_id]
+        for author_id in rng.sample(
+                authors, min(options['follows'], len(authors))):
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+        for recipe_id in rng.sample(
+                recipe_ids, min(options['favorites'], len(recipe_ids))):
+            favorites.append(
+                Favoritelist(user_id=user_id, recipe_id=recipe_id)
+            )
+        for recipe_id in rng.sample(
+                recipe_ids, min(options['cart'], len(recipe_ids))):
+            carts.append(Shoppinglist(user_id=user_id, recipe_id=recipe_id))
+    for model, objs in (
+        (Follow, follows), (Favoritelist, favorites), (Shoppinglist, carts),
+    ):
+        model.objects.bulk_create(objs, batch_size=settings.SEED_BATCH_SIZE)
+
+
+def seed_database(users, recipes, tags=len(SEED_TAGS), follows=10,
+                  favorites=5, cart=5, authors_share=0.2,
+                  ingredients_path=None, prefix='seed', random_seed=0):
+    """Наполняет базу синтетическими данными пакетными вставками.
+    Возвращает число созданных объектов по типам.
+    """
+    rng = random.Random(random_seed)
+    with transaction.atomic():
+        ingredient_ids = seed_ingredients(
+            ingredients_path or settings.PATH + settings.FILENAME
+        )
+        tag_ids = seed_tags(tags)
+        user_ids = seed_users(users, prefix)
+        author_ids = user_ids[:max(1, int(len(user_ids) * authors_share))]
+        recipe_ids = seed_recipes(
+            rng, recipes, author_ids, tag_ids, ingredient_ids
+        )
+        seed_user_links(rng, user_ids, author_ids, recipe_ids, {
+            'follows': follows, 'favorites': favorites, 'cart': cart,
+        })
+        refresh_totals(users=user_ids)
+        update_ingredients_count(recipe_ids)
+        update_search_vector(recipe_ids)
+        for field in ('favorites_count', 'cart_count'):
+            recount(field, recipe_ids)
+        for field in ('recipes_count', 'followers_count'):
+            recount(field, user_ids)
+    bump_table_version(Ingredient)
+    bump_table_version(Tag)
+    return {
+        'users': len(user_ids),
+        'recipes': len(recipe_ids),
+        'ingredients': len(ingredient_ids),
+        'tags': len(tag_ids),
+    }
+
+
+def budget_requests(author, recipe, tag, tag_slugs, ingredient):
+    """Маршруты api/urls.py с параметрами горячих сценариев."""
+    tags = '&'.join(f'tags={slug}' for slug in tag_slugs)
+    prefix = ingredient.name[:2]
+    search = ingredient.name.split()[0]
+    pantry = '&'.join(
+        f'ingredients={ingredient_id}' for ingredient_id in
+        recipe.ingredients.values_list('id', flat=True)[:3]
+    )
+    return {
+        'users-list': '/api/users/',
+        'users-me': '/api/users/me/',
+        'users-detail': f'/api/users/{author.id}/',
+        'users-subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+        'tags-list': '/api/tags/',
+        'tags-detail': f'/api/tags/{tag.id}/',
+        'ingredients-list': f'/api/ingredients/?name={prefix}',
+        'recipes-list': '/api/recipes/',
+        'recipes-list-anonymous': '/api/recipes/',
+        'recipes-list-tags': f'/api/recipes/?{tags}',
+        'recipes-list-author': f'/api/recipes/?author={author.id}',
+        'recipes-list-favorited': '/api/recipes/?is_favorited=1',
+        'recipes-list-in-cart': '/api/recipes/?is_in_shopping_cart=1',
+        'recipes-list-cursor': '/api/recipes/?cursor=',
+        'recipes-list-search': f'/api/recipes/?search={search}',
+        'recipes-list-popular': '/api/recipes/?ordering=popular',
+        'recipes-feed': '/api/recipes/feed/',
+        'recipes-pantry': f'/api/recipes/pantry/?{pantry}',
+        'recipes-detail': f'/api/recipes/{recipe.id}/',
+        'recipes-download-shopping-cart':
+            '/api/recipes/download_shopping_cart/',
+    }
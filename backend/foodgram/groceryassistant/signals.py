@@ -0,0 +1,150 @@
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from groceryassistant.aggregates import refresh_totals
+from groceryassistant.catalog import ingredient_catalog
+from groceryassistant.counters import AUTHOR_COUNTERS, adjust_counter, recount
+from groceryassistant.feed import (invalidate_timelines,
+                                   schedule_timeline_invalidation)
+from groceryassistant.images import schedule_renditions
+from groceryassistant.models import (Favoritelist, Ingredient,
+                                     IngredientInRecipe, RecipeList,
+                                     Shoppinglist, Tag)
+from groceryassistant.pantry import (schedule_ingredients_count_update,
+                                     update_ingredients_count)
+from groceryassistant.search import (schedule_search_update,
+                                     update_search_vector)
+from groceryassistant.versions import bump_table_version
+from users.models import Follow, User
+
+
+@receiver(pre_delete, sender=RecipeList)
+def update_deleted_recipe_totals(sender, instance, **kwargs):
+    """Пересчёт итогов после удаления рецепта из чужих корзин.
+    Порядок каскадного удаления ингредиентов рецепта и строк корзины
+    не определён, поэтому затронутые id запоминаются заранее.
+    """
+    users = list(
+        Shoppinglist.objects.filter(recipe=instance).values_list(
+            'user', flat=True
+        )
+    )
+    if not users:
+        return
+    ingredients = list(
+        IngredientInRecipe.objects.filter(recipe=instance).values_list(
+            'ingredient', flat=True
+        )
+    )
+    transaction.on_commit(
+        lambda: refresh_totals(users=users, ingredients=ingredients)
+    )
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_reference_version(sender, **kwargs):
+    """Новая версия справочника при изменении тегов или ингредиентов."""
+    bump_table_version(sender)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_catalog(sender, **kwargs):
+    """Сброс справочника и индекса автодополнения
+    при изменении ингредиентов.
+    """
+    ingredient_catalog.invalidate()
+
+
+@receiver(post_save, sender=RecipeList)
+def process_recipe_image(sender, instance, **kwargs):
+    """Фоновое создание уменьшенных копий картинки рецепта."""
+    schedule_renditions(instance.image)
+
+
+@receiver(post_save, sender=RecipeList)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    """Поисковый вектор пересчитывается после сохранения ингредиентов."""
+    schedule_search_update(instance.pk)
+
+
+@receiver(post_save, sender=RecipeList)
+def update_recipe_ingredients_count(sender, instance, **kwargs):
+    """Счётчик ингредиентов пересчитывается после сохранения состава."""
+    schedule_ingredients_count_update(instance.pk)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search(sender, instance, created, **kwargs):
+    """Переименование ингредиента меняет поиск по его рецептам."""
+    if not created:
+        update_search_vector(
+            IngredientInRecipe.objects.filter(
+                ingredient=instance
+            ).values('recipe')
+        )
+
+
+@receiver(pre_delete, sender=Ingredient)
+def update_deleted_ingredient_search(sender, instance, **kwargs):
+    recipes = list(
+        IngredientInRecipe.objects.filter(
+            ingredient=instance
+        ).values_list('recipe', flat=True)
+    )
+    if recipes:
+        transaction.on_commit(lambda: update_search_vector(recipes))
+        transaction.on_commit(lambda: update_ingredients_count(recipes))
+
+
+@receiver(post_save, sender=RecipeList)
+@receiver(post_save, sender=Follow)
+def increment_author_counter(sender, instance, created, **kwargs):
+    """Число рецептов и подписчиков автора."""
+    if created:
+        adjust_counter(AUTHOR_COUNTERS[sender], instance.author_id, 1)
+
+
+@receiver(post_delete, sender=RecipeList)
+@receiver(post_delete, sender=Follow)
+def decrement_author_counter(sender, instance, **kwargs):
+    adjust_counter(AUTHOR_COUNTERS[sender], instance.author_id, -1)
+
+
+@receiver(pre_delete, sender=User)
+def update_deleted_user_recipe_counters(sender, instance, **kwargs):
+    """Избранное и корзина пользователя удаляются каскадно без сигналов,
+    поэтому счётчики затронутых рецептов пересчитываются после фиксации.
+    """
+    favorites = list(
+        Favoritelist.objects.filter(user=instance).values_list(
+            'recipe', flat=True
+        )
+    )
+    cart = list(
+        Shoppinglist.objects.filter(user=instance).values_list(
+            'recipe', flat=True
+        )
+    )
+    if favorites:
+        transaction.on_commit(lambda: recount('favorites_count', favorites))
+    if cart:
+        transaction.on_commit(lambda: recount('cart_count', cart))
+
+
+@receiver((post_save, post_delete), sender=RecipeList)
+def invalidate_author_timelines(sender, instance, created=True, **kwargs):
+    """Новый или удалённый рецепт меняет ленты подписчиков автора.
+    post_delete не передаёт created, поэтому по умолчанию True.
+    """
+    if created:
+        schedule_timeline_invalidation([instance.author_id])
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def invalidate_follower_timeline(sender, instance, **kwargs):
+    """Подписка или отписка меняет состав ленты подписчика."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_timelines([user_id]))
@@ -0,0 +1,30 @@
+
+import time
+import uuid
+
+from django.core.cache import cache
+
+from foodgram import settings
+
+
+def get_table_version(model):
+    """Текущая версия таблицы: (метка, время последнего изменения)."""
+    key = f'table_version:{model._meta.label_lower}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(
+            key,
+            (uuid.uuid4().hex, int(time.time())),
+            settings.TABLE_VERSION_TIMEOUT,
+        )
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(model):
+    """Новая версия таблицы делает все закешированные ответы устаревшими."""
+    cache.set(
+        f'table_version:{model._meta.label_lower}',
+        (uuid.uuid4().hex, int(time.time())),
+        settings.TABLE_VERSION_TIMEOUT,
+    )
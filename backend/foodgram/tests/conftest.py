@@ -0,0 +1,122 @@
+import os
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from groceryassistant.catalog import ingredient_catalog
+from groceryassistant.models import Ingredient, RecipeList, Tag
+from groceryassistant.seed import budget_requests, seed_database
+from users.models import User
+
+# Размер тестовой базы: по умолчанию — тысячи пользователей и рецептов,
+# для быстрого локального прогона его можно уменьшить.
+SEED_USERS = int(os.getenv('TEST_SEED_USERS', 2000))
+SEED_RECIPES = int(os.getenv('TEST_SEED_RECIPES', 5000))
+# Маршрут: максимум запросов к базе на один запрос к API.
+QUERY_BUDGETS = {
+    'users-list': 3,
+    'users-me': 1,
+    'users-detail': 2,
+    'users-subscriptions': 3,
+    'tags-list': 1,
+    'tags-detail': 1,
+    'ingredients-list': 1,
+    'recipes-list': 5,
+    'recipes-list-anonymous': 5,
+    'recipes-list-tags': 6,
+    'recipes-list-author': 6,
+    'recipes-list-favorited': 5,
+    'recipes-list-in-cart': 5,
+    'recipes-list-cursor': 4,
+    'recipes-list-search': 5,
+    'recipes-pantry': 5,
+    'recipes-feed': 6,
+    'recipes-list-popular': 5,
+    'recipes-detail': 4,
+    'recipes-download-shopping-cart': 1,
+}
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Тестовая база наполняется один раз на сессию (с --reuse-db —
+    один раз): запросы к базе проверяются на данных, похожих на рабочие.
+    """
+    with django_db_blocker.unblock():
+        if not RecipeList.objects.exists():
+            seed_database(SEED_USERS, SEED_RECIPES)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(db):
+    """Каждый тест начинается с пустого кеша, то есть с худшего случая.
+    Справочник ингредиентов загружается заранее: это разовая стоимость
+    воркера, а не запроса.
+    """
+    cache.clear()
+    ingredient_catalog.snapshot(reload=True)
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def viewer(db):
+    """Пользователь с подписками и списком покупок."""
+    return User.objects.filter(
+        follower__isnull=False, shopping_list__isnull=False
+    ).first()
+
+
+@pytest.fixture
+def recipe(db):
+    return RecipeList.objects.first()
+
+
+@pytest.fixture
+def endpoints(db, recipe):
+    """Маршруты API с параметрами горячих сценариев."""
+    return budget_requests(
+        User.objects.filter(recipelist__isnull=False).first(),
+        recipe,
+        Tag.objects.first(),
+        list(Tag.objects.values_list('slug', flat=True)[:2]),
+        Ingredient.objects.first(),
+    )
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Картинки, загруженные в тесте, сохраняются во временный каталог."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def recipe_data(db, media_root):
+    """Данные нового рецепта для POST /api/recipes/."""
+    return {
+        'name': 'Рецепт с картинкой',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': IMAGE,
+        'tags': [Tag.objects.first().id],
+        'ingredients': [
+            {'id': Ingredient.objects.first().id, 'amount': 2},
+        ],
+    }
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def viewer_client(api_client, viewer):
+    api_client.force_authenticate(viewer)
+    return api_client
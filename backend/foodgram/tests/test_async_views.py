@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api import async_views
+from api.views import TagViewSet
+
+
+class CookieView(APIView):
+    permission_classes = ()
+
+    def get(self, request):
+        response = Response({'ok': True})
+        response.set_cookie('sessionid', 'value')
+        return response
+
+
+def test_run_view_keeps_cookies():
+    response = async_views.run_view(
+        CookieView.as_view(), RequestFactory().get('/')
+    )
+    assert response.status_code == 200
+    assert response.cookies['sessionid'].value == 'value'
+
+
+@pytest.mark.parametrize('method, thread_sensitive', (
+    ('get', False),
+    ('head', False),
+    ('options', False),
+    ('post', True),
+    ('delete', True),
+))
+def test_only_safe_methods_leave_the_shared_thread(
+        monkeypatch, method, thread_sensitive):
+    used = []
+
+    def fake_sync_to_async(func, thread_sensitive):
+        async def run(*args, **kwargs):
+            used.append(thread_sensitive)
+            return func(*args, **kwargs)
+        return run
+
+    monkeypatch.setattr(async_views, 'sync_to_async', fake_sync_to_async)
+    monkeypatch.setattr(
+        async_views, 'run_view', lambda view, request: HttpResponse()
+    )
+    wrapper = async_views.async_view(
+        TagViewSet, {'get': 'list'}, 'tags', False
+    )
+    asyncio.run(wrapper(getattr(RequestFactory(), method)('/api/tags/')))
+    assert used == [thread_sensitive]
@@ -0,0 +1,50 @@
+import pytest
+
+from foodgram import settings
+
+
+def assert_not_modified(client, url):
+    """Повторный запрос с ETag первого ответа получает 304 без тела."""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert not response.content
+
+
+@pytest.mark.django_db
+def test_tags_not_modified(api_client):
+    assert_not_modified(api_client, '/api/tags/')
+
+
+@pytest.mark.django_db
+def test_ingredients_search_not_modified(api_client):
+    assert_not_modified(api_client, '/api/ingredients/?name=аб')
+
+
+@pytest.mark.django_db
+def test_ingredients_search_is_cached(api_client, monkeypatch,
+                                      django_assert_num_queries):
+    monkeypatch.setattr(settings, 'INGREDIENT_INDEX_ENABLED', False)
+    api_client.get('/api/ingredients/?name=аб&limit=5')
+    with django_assert_num_queries(0):
+        response = api_client.get('/api/ingredients/?name=аб&limit=5')
+    assert response.status_code == 200
+    assert len(response.data) == 5
+
+
+@pytest.mark.django_db
+def test_recipe_detail_not_modified(viewer_client, recipe):
+    assert_not_modified(viewer_client, f'/api/recipes/{recipe.id}/')
+
+
+@pytest.mark.django_db
+def test_recipe_detail_etag_changes(viewer_client, recipe):
+    url = f'/api/recipes/{recipe.id}/'
+    etag = viewer_client.get(url)['ETag']
+    viewer_client.post(f'{url}favorite/')
+    response = viewer_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
@@ -0,0 +1,35 @@
+import pytest
+
+from foodgram import settings
+from groceryassistant.catalog import IngredientCatalog, ingredient_catalog
+from groceryassistant.models import Ingredient
+
+
+@pytest.mark.django_db
+def test_catalog_reloads_after_max_age(monkeypatch):
+    """Изменение в обход сигналов не меняет версию таблицы,
+    но попадает в справочник после INGREDIENT_CATALOG_MAX_AGE.
+    """
+    ingredient = Ingredient.objects.first()
+    ingredient_catalog.snapshot()
+    Ingredient.objects.filter(pk=ingredient.pk).update(name='переименован')
+    assert ingredient_catalog.get(ingredient.pk)[0] == ingredient.name
+    monkeypatch.setattr(settings, 'INGREDIENT_CATALOG_MAX_AGE', -1)
+    assert ingredient_catalog.get(ingredient.pk)[0] == 'переименован'
+
+
+@pytest.mark.django_db
+def test_recipe_ingredients_without_catalog(viewer_client, recipe,
+                                            monkeypatch):
+    monkeypatch.setattr(IngredientCatalog, 'get', lambda self, pk: None)
+    response = viewer_client.get(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    expected = {
+        (item.ingredient_id, item.ingredient.name,
+         item.ingredient.measurement_unit)
+        for item in recipe.ingredientinrecipe.select_related('ingredient')
+    }
+    assert {
+        (item['id'], item['name'], item['measurement_unit'])
+        for item in response.data['ingredients']
+    } == expected
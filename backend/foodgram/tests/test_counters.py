@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from groceryassistant.counters import reconcile_counters
+from groceryassistant.models import RecipeList
+from users.models import Follow, User
+
+NO_DRIFT = dict.fromkeys(
+    ('favorites_count', 'cart_count', 'recipes_count', 'followers_count'), 0
+)
+
+
+@pytest.mark.django_db
+def test_no_drift_after_create_and_delete(
+        viewer_client, viewer, recipe_data,
+        django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe_id = viewer_client.post(
+            '/api/recipes/', recipe_data, format='json'
+        ).data['id']
+        for action in ('favorite', 'shopping_cart'):
+            viewer_client.post(f'/api/recipes/{recipe_id}/{action}/')
+    assert reconcile_counters(fix=False) == NO_DRIFT
+
+    author = User.objects.exclude(
+        following__user=viewer).exclude(pk=viewer.pk).first()
+    followed = Follow.objects.filter(user=viewer).first().author
+    with django_capture_on_commit_callbacks(execute=True):
+        viewer_client.post(f'/api/users/{author.id}/subscribe/')
+        viewer_client.delete(f'/api/users/{followed.id}/subscribe/')
+        viewer_client.delete(
+            f'/api/recipes/{recipe_id}/favorite/'
+        )
+    assert reconcile_counters(fix=False) == NO_DRIFT
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert viewer_client.delete(
+            f'/api/recipes/{recipe_id}/'
+        ).status_code == 204
+        User.objects.filter(
+            favorites__isnull=False, shopping_list__isnull=False
+        ).exclude(pk=viewer.pk).first().delete()
+    assert reconcile_counters(fix=False) == NO_DRIFT
+
+
+@pytest.mark.django_db
+def test_reconcile_command_fixes_drift(recipe):
+    RecipeList.objects.filter(pk=recipe.pk).update(favorites_count=10 ** 6)
+    with pytest.raises(CommandError):
+        call_command('reconcile_counters', '--check')
+    call_command('reconcile_counters')
+    call_command('reconcile_counters', '--check')
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == recipe.favorites.count()
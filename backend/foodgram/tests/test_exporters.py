@@ -0,0 +1,38 @@
+import pytest
+
+from api.exporters import export_pdf
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('file_format, content_type', (
+    ('txt', 'text/plain; charset=utf-8'),
+    ('csv', 'text/csv; charset=utf-8'),
+    ('json', 'application/json; charset=utf-8'),
+    ('pdf', 'application/pdf'),
+))
+def test_download_shopping_cart(viewer_client, file_format, content_type):
+    response = viewer_client.get(
+        f'/api/recipes/download_shopping_cart/?file_format={file_format}'
+    )
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Type'] == content_type
+    assert response['Content-Disposition'].endswith(f'.{file_format}"')
+    assert b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_download_shopping_cart_unknown_format(viewer_client):
+    response = viewer_client.get(
+        '/api/recipes/download_shopping_cart/?file_format=xls'
+    )
+    assert response.status_code == 400
+
+
+def test_export_pdf_pages():
+    rows = [(f'Ингредиент {number}', 'г', number) for number in range(200)]
+    document = b''.join(export_pdf(iter(rows)))
+    assert document.startswith(b'%PDF')
+    assert document.rstrip().endswith(b'%%EOF')
+    assert document.count(b'/Type /Page\n') > 1
+    assert b'DejaVuSans' in document
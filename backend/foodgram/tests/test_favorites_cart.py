@@ -0,0 +1,114 @@
+import pytest
+
+from groceryassistant.aggregates import find_inconsistencies
+from groceryassistant.counters import stale_rows
+from groceryassistant.models import (Favoritelist, RecipeList, Shoppinglist,
+                                     ShoppinglistTotal)
+
+BULK_URLS = {
+    Favoritelist: '/api/recipes/favorite/bulk/',
+    Shoppinglist: '/api/recipes/shopping_cart/bulk/',
+}
+
+
+def user_recipe_ids(model, user):
+    return set(
+        model.objects.filter(user=user).values_list('recipe', flat=True)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model', BULK_URLS)
+def test_bulk_add_and_remove(viewer_client, viewer, model):
+    before = user_recipe_ids(model, viewer)
+    new = list(
+        RecipeList.objects.exclude(id__in=before).values_list(
+            'id', flat=True
+        )[:3]
+    )
+    recipe_ids = new + [next(iter(before))]
+    response = viewer_client.post(
+        BULK_URLS[model], {'recipes': recipe_ids}, format='json'
+    )
+    assert response.status_code == 201
+    assert len(response.data) == len(recipe_ids)
+    assert user_recipe_ids(model, viewer) == before | set(new)
+    assert not stale_rows('favorites_count').exists()
+    assert not stale_rows('cart_count').exists()
+    assert find_inconsistencies() == {}
+
+    response = viewer_client.delete(
+        BULK_URLS[model], {'recipes': recipe_ids}, format='json'
+    )
+    assert response.status_code == 204
+    assert user_recipe_ids(model, viewer) == before - set(recipe_ids)
+    assert not stale_rows('favorites_count').exists()
+    assert not stale_rows('cart_count').exists()
+    assert find_inconsistencies() == {}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model', BULK_URLS)
+def test_bulk_unknown_recipe(viewer_client, viewer, model):
+    before = user_recipe_ids(model, viewer)
+    recipe = RecipeList.objects.exclude(id__in=before).first()
+    response = viewer_client.post(
+        BULK_URLS[model], {'recipes': [recipe.id, 10 ** 9]}, format='json'
+    )
+    assert response.status_code == 400
+    assert 'recipes' in response.data
+    assert user_recipe_ids(model, viewer) == before
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model', BULK_URLS)
+def test_bulk_requires_recipes(viewer_client, model):
+    response = viewer_client.post(
+        BULK_URLS[model], {'recipes': []}, format='json'
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_clear_shopping_cart(viewer_client, viewer):
+    recipe_ids = user_recipe_ids(Shoppinglist, viewer)
+    assert recipe_ids
+    response = viewer_client.delete('/api/recipes/shopping_cart/clear/')
+    assert response.status_code == 204
+    assert not Shoppinglist.objects.filter(user=viewer).exists()
+    assert not ShoppinglistTotal.objects.filter(user=viewer).exists()
+    assert not stale_rows('cart_count').exists()
+    assert find_inconsistencies() == {}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action, model', (
+    ('favorite', Favoritelist),
+    ('shopping_cart', Shoppinglist),
+))
+def test_duplicate_add(viewer_client, viewer, action, model):
+    """Повторное добавление отсекает ограничение уникальности: 400."""
+    recipe = RecipeList.objects.exclude(
+        id__in=user_recipe_ids(model, viewer)
+    ).first()
+    url = f'/api/recipes/{recipe.id}/{action}/'
+    assert viewer_client.post(url).status_code == 201
+    response = viewer_client.post(url)
+    assert response.status_code == 400
+    assert 'errors' in response.data
+    assert model.objects.filter(user=viewer, recipe=recipe).count() == 1
+    assert not stale_rows('favorites_count').exists()
+    assert not stale_rows('cart_count').exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action, model', (
+    ('favorite', Favoritelist),
+    ('shopping_cart', Shoppinglist),
+))
+def test_remove_missing(viewer_client, viewer, action, model):
+    recipe = RecipeList.objects.exclude(
+        id__in=user_recipe_ids(model, viewer)
+    ).first()
+    response = viewer_client.delete(f'/api/recipes/{recipe.id}/{action}/')
+    assert response.status_code == 400
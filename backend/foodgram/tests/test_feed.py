@@ -0,0 +1,20 @@
+import pytest
+
+from groceryassistant.models import RecipeList
+from users.models import Follow
+
+
+@pytest.mark.django_db
+def test_new_recipe_appears_in_cached_feed(
+        viewer, viewer_client, django_capture_on_commit_callbacks):
+    author_id = Follow.objects.filter(user=viewer).values_list(
+        'author', flat=True
+    ).first()
+    assert viewer_client.get('/api/recipes/feed/').status_code == 200
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe = RecipeList.objects.create(
+            author_id=author_id, name='Новый рецепт', text='Описание',
+            cooking_time=10, image='groceryassistant/images/seed.jpg',
+        )
+    response = viewer_client.get('/api/recipes/feed/')
+    assert response.data['results'][0]['id'] == recipe.id
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+from groceryassistant import images
+from groceryassistant.models import RecipeList
+
+
+@pytest.mark.django_db
+def test_renditions_are_marked_ready(
+        viewer_client, recipe_data, media_root, monkeypatch,
+        django_capture_on_commit_callbacks):
+    """Копии строятся в потоке пула: здесь — синхронно, с подменой
+    открытия и закрытия подключения, чтобы не закрыть транзакцию теста.
+    """
+    calls = []
+    monkeypatch.setattr(
+        images.executor, 'submit', lambda func, *args: func(*args)
+    )
+    monkeypatch.setattr(
+        images, 'close_old_connections', lambda: calls.append('check')
+    )
+    monkeypatch.setattr(
+        images, 'connection', SimpleNamespace(
+            close=lambda: calls.append('close')
+        )
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        response = viewer_client.post(
+            '/api/recipes/', recipe_data, format='json'
+        )
+    assert response.status_code == 201
+    recipe = RecipeList.objects.get(pk=response.data['id'])
+    assert recipe.rendered_image == recipe.image.name
+    assert calls == ['check', 'close']
+    renditions = viewer_client.get(
+        f'/api/recipes/{recipe.id}/'
+    ).data['image_renditions']
+    for rendition, url in renditions.items():
+        assert url.endswith(images.rendition_name(recipe.image.name,
+                                                  rendition))
+
+
+@pytest.mark.django_db
+def test_renditions_fall_back_to_original(viewer_client, recipe_data,
+                                          media_root):
+    response = viewer_client.post('/api/recipes/', recipe_data, format='json')
+    assert response.status_code == 201
+    renditions = viewer_client.get(
+        f'/api/recipes/{response.data["id"]}/'
+    ).data['image_renditions']
+    assert set(renditions.values()) == {response.data['image']}
+
+
+@pytest.mark.django_db
+def test_invalid_base64_image(viewer_client, recipe_data, media_root):
+    recipe_data['image'] = 'data:image/png;base64,не base64'
+    response = viewer_client.post('/api/recipes/', recipe_data, format='json')
+    assert response.status_code == 400
+    assert 'image' in response.data
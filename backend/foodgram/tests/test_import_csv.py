@@ -0,0 +1,62 @@
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from groceryassistant.models import Ingredient
+
+ROWS = (
+    '  Импортная соль , г \n'
+    'Импортная соль,г\n'
+    'строка без единицы\n'
+    'Импортный сахар,г\n'
+)
+IMPORTED = {('Импортная соль', 'г'), ('Импортный сахар', 'г')}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(ROWS, encoding='utf-8')
+    return str(path)
+
+
+def run_import(*args):
+    """Прочитано, добавлено и пропущено строк по отчёту команды."""
+    stdout = StringIO()
+    call_command('import_csv', *args, stdout=stdout)
+    return tuple(map(int, re.search(
+        r'Прочитано строк: (\d+), добавлено: (\d+), пропущено: (\d+)',
+        stdout.getvalue(),
+    ).groups()))
+
+
+def imported():
+    return set(Ingredient.objects.filter(
+        name__startswith='Импортн'
+    ).values_list('name', 'measurement_unit'))
+
+
+@pytest.mark.django_db
+def test_dry_run(csv_path):
+    assert run_import('--path', csv_path, '--dry-run') == (3, 2, 1)
+    assert imported() == set()
+
+
+@pytest.mark.django_db
+def test_rerun_is_idempotent(csv_path):
+    assert run_import('--path', csv_path, '--batch-size', '1') == (3, 2, 1)
+    assert imported() == IMPORTED
+    assert run_import('--path', csv_path) == (3, 0, 3)
+    assert run_import('--path', csv_path, '--dry-run') == (3, 0, 3)
+
+
+@pytest.mark.django_db
+def test_copy_imports_same_rows(csv_path):
+    if connection.vendor != 'postgresql':
+        pytest.skip('COPY доступен только в PostgreSQL')
+    assert run_import('--path', csv_path, '--copy') == (3, 2, 1)
+    assert imported() == IMPORTED
+    assert run_import('--path', csv_path) == (3, 0, 3)
@@ -0,0 +1,48 @@
+import pytest
+
+from api.metrics import registry
+
+
+def timings(response):
+    """Компоненты Server-Timing: имя -> длительность в миллисекундах."""
+    result = {}
+    for part in response['Server-Timing'].split(','):
+        name, *params = part.strip().split(';')
+        result[name] = next(
+            float(param[len('dur='):]) for param in params
+            if param.startswith('dur=')
+        )
+    return result
+
+
+@pytest.mark.django_db
+def test_server_timing_header(api_client):
+    response = api_client.get('/api/tags/')
+    assert response.status_code == 200
+    assert list(timings(response)) == [
+        'db', 'serializer', 'renderer', 'total'
+    ]
+
+
+@pytest.mark.django_db
+def test_serializer_timing(viewer_client, monkeypatch):
+    monkeypatch.setattr(registry, 'views', {})
+    response = viewer_client.get('/api/recipes/')
+    assert response.status_code == 200
+    assert 0 < timings(response)['serializer'] <= timings(response)['total']
+    stats = registry.snapshot()['GET api:recipes-list']
+    assert stats['serialization_sum'] > 0
+
+
+@pytest.mark.django_db
+def test_prometheus_serialization_series(viewer_client, viewer,
+                                         monkeypatch):
+    monkeypatch.setattr(registry, 'views', {})
+    viewer_client.get('/api/recipes/')
+    viewer.is_staff = True
+    response = viewer_client.get('/api/metrics/', {'format': 'prometheus'})
+    assert response.status_code == 200
+    assert (
+        'foodgram_request_serialization_seconds_count'
+        '{view="GET api:recipes-list"} 1'
+    ) in response.content.decode()
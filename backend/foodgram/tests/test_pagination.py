@@ -0,0 +1,38 @@
+import pytest
+
+from foodgram import settings
+
+
+@pytest.mark.django_db
+def test_limit_is_capped(viewer_client):
+    response = viewer_client.get(
+        '/api/recipes/', {'limit': settings.MAX_PAGE_SIZE + 1}
+    )
+    assert response.status_code == 200
+    assert len(response.data['results']) == settings.MAX_PAGE_SIZE
+
+
+@pytest.mark.django_db
+def test_cursor_uses_keyset_for_default_ordering(viewer_client):
+    response = viewer_client.get('/api/recipes/', {'cursor': ''})
+    assert response.status_code == 200
+    assert 'count' not in response.data
+    assert 'cursor=' in response.data['next']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', (
+    {'ordering': 'popular'},
+    {'search': 'суп'},
+))
+def test_cursor_keeps_custom_ordering(viewer_client, params):
+    """Курсор по Meta.ordering потерял бы порядок выборки,
+    поэтому такие списки остаются постраничными.
+    """
+    response = viewer_client.get('/api/recipes/', {'cursor': '', **params})
+    plain = viewer_client.get('/api/recipes/', params)
+    assert response.status_code == 200
+    assert 'count' in response.data
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        recipe['id'] for recipe in plain.data['results']
+    ]
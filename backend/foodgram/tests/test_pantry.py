@@ -0,0 +1,81 @@
+import pytest
+
+from foodgram import settings
+from groceryassistant.models import Ingredient, IngredientInRecipe, RecipeList
+from groceryassistant.pantry import update_ingredients_count
+from users.models import User
+
+# Рецепт: номера его ингредиентов в ingredients.
+RECIPES = {
+    'Всё есть': (0, 1),
+    'Не хватает одного': (0, 1, 2, 3),
+    'Не хватает двух': (0, 4, 5),
+    'Ничего нет': (6,),
+}
+PANTRY = (0, 1, 2)
+
+
+@pytest.fixture
+def pantry_author(db):
+    """Автор с рецептами известного состава: фильтр author
+    отделяет их от рецептов тестовой базы.
+    """
+    author = User.objects.create(
+        username='pantry', email='pantry@example.com'
+    )
+    ingredients = list(Ingredient.objects.all()[:7])
+    for name, numbers in RECIPES.items():
+        recipe = RecipeList.objects.create(
+            author=author, name=name, text='Описание', cooking_time=10,
+            image=settings.SEED_IMAGE,
+        )
+        IngredientInRecipe.objects.bulk_create([
+            IngredientInRecipe(
+                recipe=recipe, ingredient=ingredients[number], amount=1
+            )
+            for number in numbers
+        ])
+    update_ingredients_count(author.recipelist_set.values('id'))
+    author.pantry = [ingredients[number].id for number in PANTRY]
+    return author
+
+
+@pytest.mark.django_db
+def test_pantry_ranking(viewer_client, pantry_author):
+    response = viewer_client.get('/api/recipes/pantry/', {
+        'ingredients': pantry_author.pantry, 'author': pantry_author.id,
+    })
+    assert response.status_code == 200
+    assert [
+        (item['name'], item['matched_count'], item['missing_count'],
+         round(item['coverage'], 2))
+        for item in response.data['results']
+    ] == [
+        ('Всё есть', 2, 0, 1.0),
+        ('Не хватает одного', 3, 1, 0.75),
+        ('Не хватает двух', 1, 2, 0.33),
+    ]
+
+
+@pytest.mark.django_db
+def test_pantry_max_missing(viewer_client, pantry_author):
+    response = viewer_client.get('/api/recipes/pantry/', {
+        'ingredients': ','.join(map(str, pantry_author.pantry)),
+        'author': pantry_author.id,
+        'max_missing': 1,
+    })
+    assert response.status_code == 200
+    assert [item['name'] for item in response.data['results']] == [
+        'Всё есть', 'Не хватает одного'
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', (
+    {},
+    {'ingredients': 'abc'},
+    {'ingredients': 1, 'max_missing': -1},
+))
+def test_pantry_invalid_params(viewer_client, params):
+    response = viewer_client.get('/api/recipes/pantry/', params)
+    assert response.status_code == 400
@@ -0,0 +1,22 @@
+import pytest
+
+from tests.conftest import QUERY_BUDGETS
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', QUERY_BUDGETS)
+def test_query_budget(name, endpoints, api_client, viewer,
+                      django_assert_max_num_queries):
+    """Маршрут укладывается в QUERY_BUDGETS по числу запросов к базе."""
+    if not name.endswith('-anonymous'):
+        api_client.force_authenticate(viewer)
+    with django_assert_max_num_queries(QUERY_BUDGETS[name]):
+        response = api_client.get(endpoints[name])
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_every_endpoint_has_budget(endpoints):
+    assert set(endpoints) == set(QUERY_BUDGETS)
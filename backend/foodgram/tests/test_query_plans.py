@@ -0,0 +1,95 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+
+from api.filtres import RecipeFilter
+from groceryassistant.models import (Favoritelist, Ingredient,
+                                     IngredientInRecipe, RecipeList,
+                                     Shoppinglist, ShoppinglistTotal, Tag)
+from groceryassistant.search import full_text_enabled
+from users.models import User
+
+PAGE_SIZE = 6
+# Признак полного просмотра таблицы в плане запроса.
+FULL_SCAN_PATTERNS = {
+    'postgresql': r'Seq Scan on {}\b',
+    'sqlite': r'\bSCAN (?:TABLE )?{}\b(?! USING)',
+}
+TABLES = [
+    model._meta.db_table for model in (
+        RecipeList, IngredientInRecipe, Favoritelist,
+        Shoppinglist, ShoppinglistTotal,
+    )
+]
+RECIPE_FILTERS = (
+    'recipes', 'recipes_by_author', 'recipes_by_tags', 'recipes_favorited',
+    'recipes_in_shopping_cart', 'recipes_popular', 'recipes_search',
+)
+
+
+@pytest.fixture(autouse=True)
+def index_plans(db):
+    """В тестовой базе немного строк, и PostgreSQL выбрал бы полный
+    просмотр по стоимости. С enable_seqscan = off он остаётся в плане,
+    только если запрос не может использовать ни один индекс.
+    """
+    if connection.vendor not in FULL_SCAN_PATTERNS:
+        pytest.skip(f'EXPLAIN не проверяется для {connection.vendor}')
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+
+@pytest.fixture
+def filter_params(db):
+    """Параметры запроса к списку рецептов для каждого фильтра."""
+    return {
+        'recipes': {},
+        'recipes_by_author': {
+            'author': User.objects.filter(
+                recipelist__isnull=False).first().id,
+        },
+        'recipes_by_tags': {
+            'tags': list(Tag.objects.values_list('slug', flat=True)[:2]),
+        },
+        'recipes_favorited': {'is_favorited': 1},
+        'recipes_in_shopping_cart': {'is_in_shopping_cart': 1},
+        'recipes_popular': {'ordering': 'popular'},
+        'recipes_search': {
+            'search': Ingredient.objects.first().name.split()[0],
+        },
+    }
+
+
+def assert_no_full_scans(queryset):
+    plan = queryset.explain()
+    pattern = FULL_SCAN_PATTERNS[connection.vendor]
+    full_scans = [
+        table for table in TABLES
+        if re.search(pattern.format(re.escape(table)), plan)
+    ]
+    assert not full_scans, plan
+
+
+@pytest.mark.parametrize('name', RECIPE_FILTERS)
+def test_recipe_filter_plan(name, filter_params, viewer):
+    """Страница списка рецептов, отобранная RecipeFilter так же,
+    как в RecipeViewSet, читается по индексам.
+    """
+    if name == 'recipes_search' and not full_text_enabled():
+        pytest.skip('Без PostgreSQL поиск идёт по вхождению без индекса')
+    request = RequestFactory().get('/api/recipes/', filter_params[name])
+    request.user = viewer
+    queryset = RecipeFilter(
+        request.GET,
+        queryset=RecipeList.objects.for_read(viewer),
+        request=request,
+    ).qs
+    assert_no_full_scans(queryset[:PAGE_SIZE])
+
+
+def test_shopping_cart_plan(viewer):
+    """Список покупок читается из ShoppinglistTotal по индексу."""
+    assert_no_full_scans(ShoppinglistTotal.objects.filter(user=viewer))
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from groceryassistant.models import RecipeList
+
+URL = '/api/recipes/bulk/'
+
+
+@pytest.mark.django_db
+def test_bulk_create_reports_each_item(viewer_client, viewer, recipe_data):
+    second = dict(recipe_data, name='Второй рецепт')
+    invalid = dict(recipe_data, cooking_time=0)
+    recipes_count = viewer.recipes_count
+    response = viewer_client.post(
+        URL, [recipe_data, invalid, second], format='json'
+    )
+    assert response.status_code == 201
+    first, error, last = response.data
+    assert 'cooking_time' in error['errors']
+    assert [first['name'], last['name']] == [
+        recipe_data['name'], second['name']
+    ]
+    created = RecipeList.objects.filter(id__in=[first['id'], last['id']])
+    assert created.count() == 2
+    for recipe in created:
+        assert recipe.author == viewer
+        assert list(recipe.tags.values_list('id', flat=True)) == (
+            recipe_data['tags']
+        )
+        assert list(
+            recipe.ingredientinrecipe.values_list('ingredient', 'amount')
+        ) == [(recipe_data['ingredients'][0]['id'], 2)]
+        assert recipe.ingredients_count == 1
+    viewer.refresh_from_db()
+    assert viewer.recipes_count == recipes_count + 2
+
+
+@pytest.mark.django_db
+def test_bulk_create_all_invalid(viewer_client, recipe_data):
+    recipes = RecipeList.objects.count()
+    response = viewer_client.post(URL, [
+        dict(recipe_data, tags=[10 ** 9]),
+        dict(recipe_data, ingredients=[{'id': 10 ** 9, 'amount': 1}]),
+    ], format='json')
+    assert response.status_code == 400
+    assert 'tags' in response.data[0]['errors']
+    assert 'ingredients' in response.data[1]['errors']
+    assert RecipeList.objects.count() == recipes
+
+
+@pytest.mark.django_db
+def test_bulk_create_ndjson(viewer_client, recipe_data):
+    body = '\n'.join(
+        json.dumps(dict(recipe_data, name=f'Рецепт {number}'))
+        for number in range(3)
+    )
+    response = viewer_client.post(
+        URL, body, content_type='application/x-ndjson'
+    )
+    assert response.status_code == 201
+    assert [item['name'] for item in response.data] == [
+        'Рецепт 0', 'Рецепт 1', 'Рецепт 2'
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('body', ([], {'name': 'не список'}))
+def test_bulk_create_expects_list(viewer_client, body):
+    response = viewer_client.post(URL, body, format='json')
+    assert response.status_code == 400
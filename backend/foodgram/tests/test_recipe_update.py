@@ -0,0 +1,63 @@
+import pytest
+
+from groceryassistant.models import Ingredient
+
+
+@pytest.fixture
+def author_client(api_client, recipe):
+    api_client.force_authenticate(recipe.author)
+    return api_client
+
+
+def update_data(recipe, ingredients):
+    return {
+        'ingredients': ingredients,
+        'tags': list(recipe.tags.values_list('id', flat=True)),
+    }
+
+
+@pytest.mark.django_db
+def test_update_keeps_unchanged_ingredient_rows(author_client, recipe):
+    """Изменённые строки обновляются на месте, новые добавляются,
+    лишние удаляются; строки без изменений сохраняют id.
+    """
+    kept, changed, removed, *rest = recipe.ingredientinrecipe.order_by('id')
+    added = Ingredient.objects.exclude(recipes=recipe).first()
+    ingredients = [
+        {'id': kept.ingredient_id, 'amount': kept.amount},
+        {'id': changed.ingredient_id, 'amount': changed.amount + 1},
+        {'id': added.id, 'amount': 3},
+    ] + [{'id': item.ingredient_id, 'amount': item.amount} for item in rest]
+    response = author_client.patch(
+        f'/api/recipes/{recipe.id}/', update_data(recipe, ingredients),
+        format='json',
+    )
+    assert response.status_code == 200
+    rows = {
+        item.ingredient_id: item
+        for item in recipe.ingredientinrecipe.all()
+    }
+    assert set(rows) == {item['id'] for item in ingredients}
+    assert rows[kept.ingredient_id].id == kept.id
+    assert rows[changed.ingredient_id].id == changed.id
+    assert rows[changed.ingredient_id].amount == changed.amount + 1
+    for item in rest:
+        assert rows[item.ingredient_id].id == item.id
+    assert rows[added.id].amount == 3
+    assert removed.ingredient_id not in rows
+
+
+@pytest.mark.django_db
+def test_update_with_unknown_ingredient(author_client, recipe):
+    """Несуществующий ингредиент отклоняется, состав не меняется."""
+    before = set(recipe.ingredientinrecipe.values_list('id', 'amount'))
+    response = author_client.patch(
+        f'/api/recipes/{recipe.id}/',
+        update_data(recipe, [{'id': 10 ** 9, 'amount': 1}]),
+        format='json',
+    )
+    assert response.status_code == 400
+    assert 'ingredients' in response.data
+    assert set(
+        recipe.ingredientinrecipe.values_list('id', 'amount')
+    ) == before
@@ -0,0 +1,41 @@
+import pytest
+
+from foodgram import settings
+from tests.conftest import QUERY_BUDGETS
+
+PAGE_SIZES = (1, settings.REST_FRAMEWORK['PAGE_SIZE'], 50)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('limit', PAGE_SIZES)
+def test_recipe_list_queries(viewer_client, limit,
+                             django_assert_num_queries):
+    """Число запросов не зависит от размера страницы."""
+    with django_assert_num_queries(QUERY_BUDGETS['recipes-list']):
+        response = viewer_client.get('/api/recipes/', {'limit': limit})
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('limit', PAGE_SIZES)
+def test_recipe_list_anonymous_queries(api_client, limit,
+                                       django_assert_num_queries):
+    with django_assert_num_queries(
+            QUERY_BUDGETS['recipes-list-anonymous']):
+        response = api_client.get('/api/recipes/', {'limit': limit})
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+@pytest.mark.django_db
+def test_recipe_detail_queries(viewer_client, recipe,
+                               django_assert_max_num_queries):
+    with django_assert_max_num_queries(
+            QUERY_BUDGETS['recipes-detail']):
+        response = viewer_client.get(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    assert response.data['id'] == recipe.id
+    assert len(response.data['ingredients']) == (
+        recipe.ingredientinrecipe.count()
+    )
@@ -0,0 +1,82 @@
+import pytest
+from rest_framework.test import APIClient
+
+from groceryassistant.aggregates import find_inconsistencies
+from groceryassistant.models import Ingredient, RecipeList, Shoppinglist
+
+
+@pytest.fixture
+def cart_recipe(db):
+    """Рецепт, который лежит в чужих списках покупок."""
+    return RecipeList.objects.filter(shopping_list__isnull=False).first()
+
+
+@pytest.fixture
+def author_client(cart_recipe):
+    client = APIClient()
+    client.force_authenticate(cart_recipe.author)
+    return client
+
+
+@pytest.mark.django_db
+def test_totals_after_add_and_remove(viewer_client, viewer):
+    recipe = RecipeList.objects.exclude(shopping_list__user=viewer).first()
+    url = f'/api/recipes/{recipe.id}/shopping_cart/'
+    assert viewer_client.post(url).status_code == 201
+    assert find_inconsistencies() == {}
+    assert viewer_client.delete(url).status_code == 204
+    assert find_inconsistencies() == {}
+
+
+@pytest.mark.django_db
+def test_totals_after_recipe_update(author_client, cart_recipe,
+                                    django_capture_on_commit_callbacks):
+    items = list(cart_recipe.ingredientinrecipe.all())
+    ingredients = [
+        {'id': item.ingredient_id, 'amount': item.amount + 1}
+        for item in items[1:]
+    ] + [{
+        'id': Ingredient.objects.exclude(
+            id__in=[item.ingredient_id for item in items]
+        ).first().id,
+        'amount': 7,
+    }]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.patch(
+            f'/api/recipes/{cart_recipe.id}/',
+            {
+                'ingredients': ingredients,
+                'tags': list(cart_recipe.tags.values_list('id', flat=True)),
+            },
+            format='json',
+        )
+    assert response.status_code == 200
+    assert find_inconsistencies() == {}
+
+
+@pytest.mark.django_db
+def test_totals_after_recipe_delete(author_client, cart_recipe,
+                                    django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.delete(f'/api/recipes/{cart_recipe.id}/')
+    assert response.status_code == 204
+    assert not Shoppinglist.objects.filter(recipe=cart_recipe.id).exists()
+    assert find_inconsistencies() == {}
+
+
+@pytest.mark.django_db
+def test_cart_and_totals_roll_back_together(viewer_client, viewer,
+                                            monkeypatch):
+    """Ошибка пересчёта итогов отменяет и изменение списка покупок."""
+    def fail(*args):
+        raise RuntimeError
+
+    recipe = RecipeList.objects.exclude(shopping_list__user=viewer).first()
+    monkeypatch.setattr('api.views.refresh_cart_totals', fail)
+    viewer_client.raise_request_exception = False
+    response = viewer_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    assert response.status_code == 500
+    assert not Shoppinglist.objects.filter(
+        user=viewer, recipe=recipe
+    ).exists()
+    assert find_inconsistencies() == {}
@@ -0,0 +1,26 @@
+import pytest
+
+from api.serializers import FollowsListSerializer
+from users.models import Follow
+
+
+@pytest.mark.django_db
+def test_duplicate_subscribe(viewer_client, viewer):
+    author = Follow.objects.filter(user=viewer).first().author
+    response = viewer_client.post(f'/api/users/{author.id}/subscribe/')
+    assert response.status_code == 400
+    assert Follow.objects.filter(user=viewer, author=author).count() == 1
+
+
+@pytest.mark.django_db
+def test_duplicate_subscribe_race(viewer_client, viewer, monkeypatch):
+    """Запрос, прошедший проверку сериализатора одновременно
+    с другим, получает 400 от ограничения уникальности, а не 500.
+    """
+    monkeypatch.setattr(
+        FollowsListSerializer, 'validate', lambda self, data: data
+    )
+    author = Follow.objects.filter(user=viewer).first().author
+    response = viewer_client.post(f'/api/users/{author.id}/subscribe/')
+    assert response.status_code == 400
+    assert Follow.objects.filter(user=viewer, author=author).count() == 1
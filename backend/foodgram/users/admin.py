@@ -1,12 +1,14 @@
 
 from django.contrib import admin
 
+from groceryassistant.counters import recount
 from users.models import Follow, User
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'email', 'username', 'first_name', 'last_name')
+    list_display = ('pk', 'email', 'username', 'first_name', 'last_name',
+                    'recipes_count', 'followers_count')
     search_fields = ('username',)
     list_filter = ('username', 'email')
     ordering = ('username',)
@@ -18,3 +20,11 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('user',)
     list_filter = ('user', 'author')
     ordering = ('user',)
+
+    def save_model(self, request, obj, form, change):
+        authors = {obj.author_id}
+        if change:
+            authors.add(Follow.objects.get(pk=obj.pk).author_id)
+        super().save_model(request, obj, form, change)
+        if change:
+            recount('followers_count', authors)
@@ -1,11 +1,45 @@
 
-from django.contrib.auth.models import AbstractUser
+from django.apps import apps
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Value
 
 from foodgram import settings
 from groceryassistant.validators import validate_forbidden_characters
 
 
+class UserQuerySet(models.QuerySet):
+    """Набор запросов пользователей с флагами для текущего пользователя."""
+    def with_subscription(self, user):
+        """Аннотирует флаг is_subscribed одним подзапросом."""
+        if not user.is_authenticated:
+            return self.annotate(is_subscribed=Value(False))
+        return self.annotate(is_subscribed=Exists(
+            Follow.objects.filter(user=user, author=OuterRef('pk'))
+        ))
+
+    def with_recipes(self, limit=None):
+        """Подгружает не более limit последних рецептов каждого
+        автора одним запросом.
+        """
+        recipe_model = apps.get_model('groceryassistant', 'RecipeList')
+        recipes = recipe_model.objects.all()
+        if limit is not None:
+            recipes = recipes.filter(id__in=Subquery(
+                recipe_model.objects.filter(
+                    author=OuterRef('author')
+                ).values('id')[:limit]
+            ))
+        return self.prefetch_related(
+            Prefetch('recipelist_set', queryset=recipes,
+                     to_attr='limited_recipes')
+        )
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    """Менеджер пользователей с доступом к методам UserQuerySet."""
+
+
 class User(AbstractUser):
     """
     Модель пользователя платформы.
@@ -38,6 +72,18 @@ class User(AbstractUser):
         max_length=settings.MAX_LENGTH,
         blank=False,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False,
+    )
+
+    objects = CustomUserManager()
 
     class Meta:
         verbose_name_plural = 'Пользователи'